@@ -1,8 +1,8 @@
 #backend/app/config.py
 
 import os
+import tempfile
 from dotenv import load_dotenv
-from supabase import create_client, Client
 
 load_dotenv()
 
@@ -10,4 +10,22 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 BUCKET_NAME = "fast"
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# "supabase" (default) or "local" for development and benchmarks
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase").lower()
+LOCAL_STORAGE_ROOT = os.getenv(
+    "LOCAL_STORAGE_ROOT", os.path.join(tempfile.gettempdir(), "api-project-storage")
+)
+LOCAL_STORAGE_BASE_URL = os.getenv("LOCAL_STORAGE_BASE_URL", "/storage")
+STORAGE_MAX_CONNECTIONS = int(os.getenv("STORAGE_MAX_CONNECTIONS", "20"))
+STORAGE_TIMEOUT = float(os.getenv("STORAGE_TIMEOUT", "60"))
+STORAGE_CONNECT_TIMEOUT = float(os.getenv("STORAGE_CONNECT_TIMEOUT", "10"))
+
+# Access tokens stay short-lived; clients renew them at POST /token/refresh
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+
+# Users allowed to read the operational /admin/*-stats, db-profile and
+# startup-report endpoints (comma separated); nobody when unset.
+ADMIN_USERNAMES = frozenset(
+    name.strip() for name in os.getenv("ADMIN_USERNAMES", "").split(",") if name.strip()
+)
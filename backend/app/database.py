@@ -1,12 +1,18 @@
 # backend/app/database.py
 import os
-from sqlalchemy import create_engine, inspect
+import threading
+import time
+from uuid import uuid4
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
 
-# Load environment variables from .env file
-load_dotenv()
+from backend.app import config, db_profile, metrics  # noqa: F401  config loads .env
 
 
 class SettingsSupabase:
@@ -15,10 +21,138 @@ class SettingsSupabase:
     POSTGRES_USER = os.getenv("POSTGRES_USER")
     POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD")
     POSTGRES_PORT = os.getenv("POSTGRES_PORT")
+    # Full SQLAlchemy URL, overrides the POSTGRES_* settings (e.g. sqlite for local runs)
+    DATABASE_URL = os.getenv("DATABASE_URL")
+
+    # Connection pool, per engine and per worker process. Size it so that
+    # workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) stays below the server/pooler limit.
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() != "false"
+    # Set when DATABASE_URL points at pgbouncer (or Supabase's pooler) in
+    # transaction mode: pooling is left to pgbouncer and prepared statements are
+    # disabled, since consecutive transactions may land on different backends.
+    DB_PGBOUNCER_TRANSACTION_MODE = (
+        os.getenv("DB_PGBOUNCER_TRANSACTION_MODE", "false").lower() == "true"
+    )
 
 
 settings_supabase = SettingsSupabase()
 
+# Async driver used for each sync backend when building the AsyncSession engine.
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url):
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
+
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+
+    def record_wait(self, elapsed: float, timed_out: bool = False):
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total += elapsed
+            self.wait_max = max(self.wait_max, elapsed)
+            if timed_out:
+                self.timeouts += 1
+
+
+class _InstrumentedPoolMixin:
+    # Times every checkout (including opening an overflow connection) so pool
+    # starvation shows up as wait time instead of only as slow requests.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record_wait(time.perf_counter() - start)
+        return conn
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncPool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url, is_async: bool = False):
+    url = make_url(url)
+    options = {"pool_pre_ping": settings_supabase.DB_POOL_PRE_PING}
+
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # In-memory SQLite lives inside a single connection; keep SQLAlchemy's default.
+        return options
+
+    if settings_supabase.DB_PGBOUNCER_TRANSACTION_MODE:
+        options["poolclass"] = NullPool
+        if is_async:
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            }
+        return options
+
+    options.update(
+        poolclass=InstrumentedAsyncPool if is_async else InstrumentedQueuePool,
+        pool_size=settings_supabase.DB_POOL_SIZE,
+        max_overflow=settings_supabase.DB_MAX_OVERFLOW,
+        pool_timeout=settings_supabase.DB_POOL_TIMEOUT,
+        pool_recycle=settings_supabase.DB_POOL_RECYCLE,
+    )
+    return options
+
+
+def pool_status(pool):
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__}
+    status = {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": settings_supabase.DB_MAX_OVERFLOW,
+    }
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        status.update(
+            wait_count=stats.wait_count,
+            wait_total_ms=round(stats.wait_total * 1000, 3),
+            wait_avg_ms=round(stats.wait_total * 1000 / stats.wait_count, 3)
+            if stats.wait_count
+            else 0.0,
+            wait_max_ms=round(stats.wait_max * 1000, 3),
+            timeouts=stats.timeouts,
+        )
+    return status
+
+
+def instrument_engine(engine):
+    metrics.instrument_engine(engine)
+    if db_profile.DB_PROFILE_ENABLED:
+        db_profile.instrument_engine(engine)
+
 
 class Database:
     _instance = None
@@ -30,36 +164,129 @@ class Database:
         return cls._instance
 
     def init_db(self):
-        SQLALCHEMY_DATABASE_URL = f"postgresql://{settings_supabase.POSTGRES_USER}:{settings_supabase.POSTGRES_PASSWORD}@{settings_supabase.POSTGRES_HOST}:{settings_supabase.POSTGRES_PORT}/{settings_supabase.POSTGRES_DATABASE}"
-        self.engine = create_engine(SQLALCHEMY_DATABASE_URL)
-        self.SessionLocal = sessionmaker(
-            autocommit=False, autoflush=False, bind=self.engine
-        )
+        # Engines and session factories are built on first use (normally the
+        # startup phase in the lifespan), so importing the app needs neither a
+        # database driver nor the network.
+        self.url = settings_supabase.DATABASE_URL or f"postgresql://{settings_supabase.POSTGRES_USER}:{settings_supabase.POSTGRES_PASSWORD}@{settings_supabase.POSTGRES_HOST}:{settings_supabase.POSTGRES_PORT}/{settings_supabase.POSTGRES_DATABASE}"
+        self._engine = None
+        self._async_engine = None
+        self._lock = threading.Lock()
         self.Base = declarative_base()
 
-    def create_tables_if_not_exist(self):
-        inspector = inspect(self.engine)
+    @property
+    def engine(self):
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    engine = create_engine(self.url, **engine_options(self.url))
+                    instrument_engine(engine)
+                    self.SessionLocal = sessionmaker(
+                        autocommit=False, autoflush=False, bind=engine
+                    )
+                    self._engine = engine
+        return self._engine
+
+    @property
+    def async_engine(self):
+        if self._async_engine is None:
+            with self._lock:
+                if self._async_engine is None:
+                    async_url = async_database_url(self.url)
+                    async_engine = create_async_engine(
+                        async_url, **engine_options(async_url, is_async=True)
+                    )
+                    instrument_engine(async_engine.sync_engine)
+                    self.AsyncSessionLocal = async_sessionmaker(
+                        async_engine, autoflush=False, expire_on_commit=False
+                    )
+                    self._async_engine = async_engine
+        return self._async_engine
+
+    def __getattr__(self, name):
+        # SessionLocal / AsyncSessionLocal exist once their engine does
+        if name == "SessionLocal":
+            self.engine
+            return self.__dict__[name]
+        if name == "AsyncSessionLocal":
+            self.async_engine
+            return self.__dict__[name]
+        raise AttributeError(name)
+
+    def engines(self):
+        # Engines created so far, for shutdown and the pool metrics
+        return {
+            name: engine
+            for name, engine in (("sync", self._engine), ("async", self._async_engine))
+            if engine is not None
+        }
+
+    async def dispose(self):
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
+        if self._engine is not None:
+            self._engine.dispose()
 
-        for table in self.Base.metadata.tables.values():
-            if not inspector.has_table(table.name):
-                table.create(self.engine)
-                print(f"Table '{table.name}' created.")
-            else:
-                print(f"Table '{table.name}' already exists.")
+    def pool_stats(self):
+        return {
+            name: pool_status(getattr(engine, "sync_engine", engine).pool)
+            for name, engine in self.engines().items()
+        }
+
+    def bootstrap_schema(self):
+        # Runs once per process from the app lifespan (or the migrations CLI),
+        # never from the request path.
+        from backend.app.migrations import run_migrations
+
+        return run_migrations(self.engine)
 
     def get_db(self):
-        self.create_tables_if_not_exist()
         db = self.SessionLocal()
         try:
             yield db
         finally:
             db.close()
 
+    async def get_async_db(self):
+        async with self.AsyncSessionLocal() as db:
+            yield db
+
 
 # Create a single instance of the Database class
 db = Database()
 
+
+def pool_metrics():
+    pools = db.pool_stats()
+    for key, name, kind, help in (
+        ("size", "db_pool_size", "gauge", "Configured pool size"),
+        ("checked_out", "db_pool_checked_out", "gauge", "Connections in use"),
+        ("idle", "db_pool_idle", "gauge", "Idle pooled connections"),
+        ("overflow", "db_pool_overflow", "gauge", "Overflow connections open"),
+        ("wait_count", "db_pool_checkouts_total", "counter", "Timed pool checkouts"),
+        ("timeouts", "db_pool_timeouts_total", "counter", "Checkouts that timed out"),
+    ):
+        yield name, kind, help, [
+            ({"engine": engine_name}, status[key])
+            for engine_name, status in pools.items()
+            if key in status
+        ]
+    yield "db_pool_wait_seconds_total", "counter", "Time spent waiting for a connection", [
+        ({"engine": engine_name}, status["wait_total_ms"] / 1000)
+        for engine_name, status in pools.items()
+        if "wait_total_ms" in status
+    ]
+
+
+metrics.registry.add_collector(pool_metrics)
+
 # Use these in your models and other parts of your application
-engine = db.engine
 Base = db.Base
 get_db = db.get_db
+get_async_db = db.get_async_db
+
+
+def __getattr__(name):
+    # engine / async_engine stay importable from here, created on first access
+    if name in ("engine", "async_engine"):
+        return getattr(db, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
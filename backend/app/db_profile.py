@@ -0,0 +1,231 @@
+# backend/app/db_profile.py
+#
+# Opt-in statement profiler (DB_PROFILE=true) built on SQLAlchemy cursor
+# events. Statements are grouped by fingerprint (literals and IN lists
+# collapsed); per request it counts statements, logs those slower than
+# DB_PROFILE_SLOW_MS together with the route, and flags a statement repeated
+# DB_PROFILE_REPEAT_THRESHOLD or more times in one request (the usual N+1
+# shape). GET /admin/db-profile returns the per-route summary and the most
+# expensive fingerprints. Meant for development, load tests and staging.
+import logging
+import os
+import re
+import threading
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from backend.app import config  # noqa: F401  loads .env
+
+logger = logging.getLogger(__name__)
+
+DB_PROFILE_ENABLED = os.getenv("DB_PROFILE", "false").lower() == "true"
+DB_PROFILE_SLOW_MS = float(os.getenv("DB_PROFILE_SLOW_MS", "100"))
+DB_PROFILE_REPEAT_THRESHOLD = int(os.getenv("DB_PROFILE_REPEAT_THRESHOLD", "3"))
+# Distinct fingerprints kept; anything beyond is counted under OVERFLOW
+DB_PROFILE_MAX_FINGERPRINTS = int(os.getenv("DB_PROFILE_MAX_FINGERPRINTS", "2000"))
+
+OVERFLOW = "(other statements)"
+BACKGROUND = "(background)"
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%s|\$\d+|:\w+)(?:\s*,\s*(?:\?|%s|\$\d+|:\w+))+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    # Same query shape -> same fingerprint, whatever the values or IN-list length
+    text = _STRING_LITERAL.sub("?", statement)
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = _PLACEHOLDER_LIST.sub("(...)", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class _Timing:
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, elapsed: float):
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "avg_ms": round(self.total * 1000 / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class _RouteSummary:
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.db_time = 0.0
+        self.slow = 0
+        self.repeated = {}  # fingerprint -> requests in which it repeated
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "queries": self.queries,
+            "avg_queries": round(self.queries / self.requests, 2) if self.requests else 0.0,
+            "max_queries": self.max_queries,
+            "db_ms": round(self.db_time * 1000, 3),
+            "avg_db_ms": round(self.db_time * 1000 / self.requests, 3) if self.requests else 0.0,
+            "slow_statements": self.slow,
+            "repeated_statements": [
+                {"statement": statement, "requests": requests}
+                for statement, requests in sorted(
+                    self.repeated.items(), key=lambda item: item[1], reverse=True
+                )
+            ],
+        }
+
+
+class RequestProfile:
+    __slots__ = ("scope", "queries", "db_time", "slow", "counts", "flagged")
+
+    def __init__(self, scope: Scope):
+        self.scope = scope
+        self.queries = 0
+        self.db_time = 0.0
+        self.slow = 0
+        self.counts = {}
+        self.flagged = []
+
+    def route(self) -> str:
+        # Resolved lazily: the router fills scope["route"] before the endpoint runs
+        route = self.scope.get("route")
+        return f"{self.scope['method']} {getattr(route, 'path', self.scope.get('path', ''))}"
+
+
+_current = ContextVar("db_profile_request", default=None)
+
+
+class DBProfiler:
+    def __init__(self, slow_ms: float, repeat_threshold: int, max_fingerprints: int):
+        self.slow_seconds = slow_ms / 1000
+        self.repeat_threshold = repeat_threshold
+        self.max_fingerprints = max_fingerprints
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._statements = {}
+            self._routes = {}
+            self._started = time.time()
+
+    def record(self, statement: str, elapsed: float):
+        key = fingerprint(statement)
+        profile = _current.get()
+        with self._lock:
+            timing = self._statements.get(key)
+            if timing is None:
+                if len(self._statements) >= self.max_fingerprints:
+                    key = OVERFLOW
+                timing = self._statements.setdefault(key, _Timing())
+            timing.add(elapsed)
+
+        route = profile.route() if profile is not None else BACKGROUND
+        if elapsed >= self.slow_seconds:
+            logger.warning("Slow query (%.1f ms) in %s: %s", elapsed * 1000, route, key)
+        if profile is None:
+            return
+
+        profile.queries += 1
+        profile.db_time += elapsed
+        profile.slow += elapsed >= self.slow_seconds
+        count = profile.counts.get(key, 0) + 1
+        profile.counts[key] = count
+        if count == self.repeat_threshold:
+            profile.flagged.append(key)
+            logger.warning(
+                "Possible N+1 in %s: statement ran %s times in one request: %s",
+                route,
+                count,
+                key,
+            )
+
+    def finish(self, profile: RequestProfile):
+        route = profile.route()
+        with self._lock:
+            summary = self._routes.get(route)
+            if summary is None:
+                summary = self._routes[route] = _RouteSummary()
+            summary.requests += 1
+            summary.queries += profile.queries
+            summary.max_queries = max(summary.max_queries, profile.queries)
+            summary.db_time += profile.db_time
+            summary.slow += profile.slow
+            for key in profile.flagged:
+                summary.repeated[key] = summary.repeated.get(key, 0) + 1
+
+    def summary(self, top: int = 20):
+        with self._lock:
+            routes = {route: summary.as_dict() for route, summary in self._routes.items()}
+            statements = sorted(
+                self._statements.items(), key=lambda item: item[1].total, reverse=True
+            )[:top]
+            return {
+                "since": self._started,
+                "slow_ms": self.slow_seconds * 1000,
+                "repeat_threshold": self.repeat_threshold,
+                "routes": dict(
+                    sorted(routes.items(), key=lambda item: item[1]["db_ms"], reverse=True)
+                ),
+                "top_statements": [
+                    {"statement": statement, **timing.as_dict()} for statement, timing in statements
+                ],
+            }
+
+
+db_profiler = DBProfiler(
+    DB_PROFILE_SLOW_MS, DB_PROFILE_REPEAT_THRESHOLD, DB_PROFILE_MAX_FINGERPRINTS
+)
+
+
+class DBProfilerMiddleware:
+    def __init__(self, app: ASGIApp, profiler: DBProfiler = db_profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        profile = RequestProfile(scope)
+        token = _current.set(profile)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
+            self.profiler.finish(profile)
+
+
+def instrument_engine(engine, profiler: DBProfiler = db_profiler):
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._profile_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_profile_started", None)
+        if started is not None:
+            profiler.record(statement, time.perf_counter() - started)
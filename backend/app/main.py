@@ -1,14 +1,40 @@
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+import logging
+import os
+import secrets
+from contextlib import asynccontextmanager
 from datetime import timedelta
-from fastapi import Depends, FastAPI, HTTPException, Request, status
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.gzip import GZipMiddleware
+from backend.app import config, db_profile, metrics
+from backend.app.middleware import HeaderMiddleware
 from backend.app.routes import DasRouteAdmin, HeroRoute
-from backend.app.database import Base, get_db, engine
+from backend.app.startup import StartupReport
+from backend.app.storage import close_storage, get_storage
+from backend.app.database import db, get_async_db
 from backend.app.utils.authenticate import authenticate_user, create_access_token
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+from backend.app.utils.email_sender import email_sender
+from backend.app.utils.hashing import password_hasher
+from backend.app.utils.image_variants import image_variant_pipeline
+from backend.app.schemas.Token import RefreshRequest, Token
+from backend.app.utils.refresh_tokens import (
+    issue_refresh_token,
+    prune_expired,
+    revoke_refresh_token,
+    rotate_refresh_token,
+)
+from backend.app.utils.rate_limit import login_throttle
+from backend.app.utils.storage_outbox import storage_outbox
+
+logger = logging.getLogger(__name__)
 
 class Config:
     DEBUG = True
@@ -16,54 +42,58 @@ class Config:
         "http://localhost:3000",
         "https://yourdomain.com",
     ]
+    # Set to "false" when migrations are applied by a separate deploy step
+    # (python -m backend.app.migrations).
+    RUN_MIGRATIONS_ON_STARTUP = os.getenv("RUN_MIGRATIONS_ON_STARTUP", "true").lower() != "false"
+    # When set, /metrics requires "Authorization: Bearer <token>"
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
 
 
-class HeaderMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        headers = {
-            "X-Content-Type-Options": "nosniff",
-            "X-Frame-Options": "DENY",
-            "X-XSS-Protection": "1; mode=block",
-            "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
-            "Cache-Control": "no-store, no-cache, must-revalidate, max-age=0",
-            "Pragma": "no-cache",
-        }
-        response.headers.update(headers)
-        return response
-
-
-app = FastAPI(
-    title="Ecommerce Project",
-    description="A project for E-commerce",
-    version="0.1.0",
-    openapi_url="/openapi.json" if Config.DEBUG else None,
-    docs_url="/docs" if Config.DEBUG else None,
-    redoc_url="/redoc" if Config.DEBUG else None,
-    debug=Config.DEBUG,
-)
-Base.metadata.create_all(bind=engine)
-
-app.add_middleware(HeaderMiddleware)
-app.add_middleware(GZipMiddleware, minimum_size=1000)
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins= ["*"] if Config.DEBUG else Config.ALLOWED_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE"],
-    allow_headers=["*"],
-)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    report = StartupReport(import_seconds=IMPORT_SECONDS)
+    with report.phase("database"):
+        # Creating the engines imports the drivers; no connection is opened yet
+        db.engine
+        db.async_engine
+    if Config.RUN_MIGRATIONS_ON_STARTUP:
+        with report.phase("migrations"):
+            await run_in_threadpool(db.bootstrap_schema)
+    with report.phase("storage"):
+        get_storage()
+    with report.phase("background workers"):
+        metrics.http_metrics.register_routes(app.routes)
+        email_sender.start()
+        storage_outbox.start()
+    app.state.startup_report = report.finish()
+    yield
+    await image_variant_pipeline.shutdown()
+    await storage_outbox.stop()
+    await close_storage()
+    await run_in_threadpool(email_sender.stop)
+    password_hasher.shutdown()
+    await db.dispose()
+
 
-app.include_router(HeroRoute.router)
-app.include_router(DasRouteAdmin.router)
-@app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
+    route = request.scope.get("route")
+    logger.error(
+        "Unhandled %s on %s %s",
+        type(exc).__name__,
+        request.method,
+        getattr(route, "path", request.url.path),
+        exc_info=exc,
+    )
     return JSONResponse(
         status_code=500,
         content={"detail": "An unexpected error occurred."},
     )
 
-@app.get("/")
+
+router = APIRouter()
+
+
+@router.get("/")
 def root():
     return {
         "info": {
@@ -75,11 +105,38 @@ def root():
         "docs": {"docs_url": "/docs", "redoc_url": "/redoc"},
     }
 
-@app.post("/token")
+@router.get("/metrics", include_in_schema=False)
+def read_metrics(request: Request):
+    if Config.METRICS_TOKEN:
+        supplied = request.headers.get("authorization", "")
+        if not secrets.compare_digest(supplied, f"Bearer {Config.METRICS_TOKEN}"):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    return PlainTextResponse(
+        metrics.registry.render(), media_type="text/plain; version=0.0.4"
+    )
+
+
+def issue_tokens(username: str, refresh_token: str):
+    access_token = create_access_token(
+        data={"sub": username},
+        expires_delta=timedelta(minutes=config.ACCESS_TOKEN_EXPIRE_MINUTES),
+    )
+    return Token(
+        access_token=access_token,
+        token_type="bearer",
+        refresh_token=refresh_token,
+        expires_in=config.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    )
+
+
+@router.post("/token", response_model=Token)
 async def login(
-    form_data: OAuth2PasswordRequestForm = Depends(), db=Depends(get_db)
+    request: Request,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db=Depends(get_async_db),
 ):
-    user = authenticate_user(db, form_data.username, form_data.password)
+    login_throttle.check(request, form_data.username)
+    user = await authenticate_user(db, form_data.username, form_data.password)
 
     if not user:
         raise HTTPException(
@@ -95,12 +152,80 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+    await prune_expired(db, user.id)
+    refresh_token = await issue_refresh_token(db, user.id)
+    await db.commit()
+    return issue_tokens(user.username, refresh_token)
+
+
+@router.post("/token/refresh", response_model=Token)
+async def refresh_access_token(body: RefreshRequest, db=Depends(get_async_db)):
+    # No password and no bcrypt: the refresh token is checked by HMAC and
+    # rotated, so each one works exactly once.
+    rotated = await rotate_refresh_token(db, body.refresh_token)
+    await db.commit()
+    if rotated is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    username, refresh_token = rotated
+    return issue_tokens(username, refresh_token)
+
+
+@router.post("/token/revoke", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_token(body: RefreshRequest, db=Depends(get_async_db)):
+    # Logout; unknown or stale tokens are ignored so the answer reveals nothing
+    if await revoke_refresh_token(db, body.refresh_token):
+        await db.commit()
+
+
+def create_app() -> FastAPI:
+    # Building the app only wires routes and middleware; clients, engines and
+    # workers are set up by the lifespan.
+    app = FastAPI(
+        title="Ecommerce Project",
+        description="A project for E-commerce",
+        version="0.1.0",
+        openapi_url="/openapi.json" if Config.DEBUG else None,
+        docs_url="/docs" if Config.DEBUG else None,
+        redoc_url="/redoc" if Config.DEBUG else None,
+        debug=Config.DEBUG,
+        lifespan=lifespan,
+    )
+
+    app.add_middleware(HeaderMiddleware)
+    app.add_middleware(GZipMiddleware, minimum_size=1000)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins= ["*"] if Config.DEBUG else Config.ALLOWED_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["GET", "POST", "PUT", "DELETE"],
+        allow_headers=["*"],
     )
-    return {"access_token": access_token, "token_type": "bearer"}
+    if db_profile.DB_PROFILE_ENABLED:
+        app.add_middleware(db_profile.DBProfilerMiddleware)
+    # Outermost, so the latency covers every other middleware
+    app.add_middleware(metrics.MetricsMiddleware)
+    app.add_exception_handler(Exception, global_exception_handler)
+
+    app.include_router(router)
+    app.include_router(HeroRoute.router)
+    app.include_router(DasRouteAdmin.router)
+    if config.STORAGE_BACKEND == "local":
+        os.makedirs(config.LOCAL_STORAGE_ROOT, exist_ok=True)
+        app.mount(
+            config.LOCAL_STORAGE_BASE_URL,
+            StaticFiles(directory=config.LOCAL_STORAGE_ROOT),
+            name="storage",
+        )
+    return app
+
 
+# uvicorn backend.app.main:app
+app = create_app()
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
 
 if __name__ == "__main__":
     import uvicorn
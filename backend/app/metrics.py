@@ -0,0 +1,353 @@
+# backend/app/metrics.py
+#
+# In-process metrics rendered in the Prometheus text format at /metrics.
+# Instruments are created up front (per route template when the app starts,
+# per operation at import), so the request path only does a bisect and a few
+# additions on existing objects; label strings are built once, not per
+# observation. Values that already live elsewhere (pool sizes, queue depths)
+# are read by collectors at scrape time.
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+UNMATCHED_ROUTE = "(unmatched)"
+# Methods outside this set (client supplied, unbounded) are labelled OTHER
+HTTP_METHODS = ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS")
+OTHER_METHOD = "OTHER"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        # Observed from the event loop and from worker threads alike
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def render(self, name: str, labels: str, lines: list):
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        prefix = labels[:-1] + "," if labels else "{"
+        cumulative = 0
+        for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{prefix}le="{_format(bound)}"}} {cumulative}')
+        lines.append(f"{name}_sum{labels} {_format(total)}")
+        lines.append(f"{name}_count{labels} {count}")
+
+
+class Counter:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Family:
+    # One metric name; children are created per label set, ideally at startup.
+    def __init__(self, name: str, kind: str, help: str, factory):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self._factory = factory
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels):
+        key = _labels(**labels)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._factory())
+        return child
+
+    def render(self, lines: list):
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} {self.kind}")
+        for labels, child in list(self._children.items()):
+            if isinstance(child, Histogram):
+                child.render(self.name, labels, lines)
+            else:
+                lines.append(f"{self.name}{labels} {_format(child.value)}")
+
+
+class Registry:
+    def __init__(self):
+        self._families = []
+        self._collectors = []
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS):
+        return self._add(Family(name, "histogram", help, lambda: Histogram(buckets)))
+
+    def counter(self, name, help):
+        return self._add(Family(name, "counter", help, Counter))
+
+    def _add(self, family):
+        self._families.append(family)
+        return family
+
+    def add_collector(self, collect):
+        # collect() -> iterable of (name, kind, help, [(labels dict, value)])
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        lines = []
+        for family in self._families:
+            family.render(lines)
+        for collect in self._collectors:
+            for name, kind, help, samples in collect():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(**labels)} {_format(value)}")
+        lines.append("")
+        return "\n".join(lines)
+
+
+registry = Registry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "Request latency by route template"
+)
+http_responses = registry.counter(
+    "http_responses_total", "Responses by route template and status class"
+)
+http_exceptions = registry.counter(
+    "http_unhandled_exceptions_total", "Requests that ended in an unhandled exception"
+)
+http_request_db_queries = registry.histogram(
+    "http_request_db_queries", "Database statements executed per request", QUERY_COUNT_BUCKETS
+)
+http_request_db_duration = registry.histogram(
+    "http_request_db_seconds", "Time spent in database statements per request"
+)
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds", "Duration of individual database statements"
+)
+db_errors = registry.counter("db_errors_total", "Database statements that raised")
+storage_duration = registry.histogram(
+    "storage_operation_duration_seconds", "Object storage calls by operation"
+)
+storage_errors = registry.counter("storage_errors_total", "Failed object storage calls")
+email_send_duration = registry.histogram(
+    "email_send_duration_seconds", "SMTP delivery time per message, including reconnects"
+)
+email_connect_duration = registry.histogram(
+    "email_connect_duration_seconds", "SMTP connection setup (TLS and login included)"
+)
+password_hash_duration = registry.histogram(
+    "password_hash_duration_seconds", "bcrypt hash/verify time on the hashing pool"
+)
+password_hash_wait = registry.histogram(
+    "password_hash_wait_seconds", "Time hash/verify jobs waited for a hashing thread"
+)
+auth_throttled = registry.counter(
+    "auth_throttled_total", "Login/registration attempts refused with 429, by bucket"
+)
+auth_throttled_cpu = registry.counter(
+    "auth_throttled_cpu_seconds_total",
+    "Estimated bcrypt time not spent on throttled attempts (observed average per job)",
+)
+token_refreshes = registry.counter(
+    "auth_token_refreshes_total", "POST /token/refresh outcomes (ok, invalid, reused)"
+)
+
+
+class _RouteMetrics:
+    __slots__ = ("duration", "db_queries", "db_duration", "statuses", "exceptions")
+
+    def __init__(self, method: str, route: str):
+        self.duration = http_request_duration.labels(method=method, route=route)
+        self.db_queries = http_request_db_queries.labels(method=method, route=route)
+        self.db_duration = http_request_db_duration.labels(method=method, route=route)
+        # Indexed by status // 100 (1xx-5xx)
+        self.statuses = [None] + [
+            http_responses.labels(method=method, route=route, status=f"{digit}xx")
+            for digit in range(1, 6)
+        ]
+        self.exceptions = http_exceptions.labels(method=method, route=route)
+
+
+class _RequestDB:
+    # Per-request statement count and time, reached through a context variable
+    # (copied into threadpool calls, so sync routes are counted too). One per
+    # request and never reused: background tasks started by the request keep
+    # it in their copied context after the request has been recorded.
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+_request_db = ContextVar("metrics_request_db", default=None)
+
+
+class HTTPMetrics:
+    def __init__(self):
+        self.in_flight = 0
+        # id(route object) -> {method: _RouteMetrics}. Routes live as long as
+        # the app and are not hashable themselves.
+        self._routes = {}
+        # Requests that matched no registered route, by method
+        self._unmatched = self._by_method(HTTP_METHODS, UNMATCHED_ROUTE)
+
+    @staticmethod
+    def _by_method(methods, route: str):
+        by_method = {method: _RouteMetrics(method, route) for method in methods}
+        by_method[OTHER_METHOD] = _RouteMetrics(OTHER_METHOD, route)
+        return by_method
+
+    def register_routes(self, routes):
+        # Called once at startup so every label set exists before traffic;
+        # lookup never creates series from request data.
+        for route in routes:
+            methods = getattr(route, "methods", None)
+            if methods:
+                self._routes[id(route)] = self._by_method(methods, route.path)
+
+    def lookup(self, scope: Scope) -> _RouteMetrics:
+        by_method = self._routes.get(id(scope.get("route")), self._unmatched)
+        metrics = by_method.get(scope["method"])
+        if metrics is None:
+            metrics = by_method[OTHER_METHOD]
+        return metrics
+
+
+http_metrics = HTTPMetrics()
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp, metrics: HTTPMetrics = http_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        request_db = _RequestDB()
+        token = _request_db.set(request_db)
+        status = 500
+        raised = False
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        except BaseException:
+            raised = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.in_flight -= 1
+            _request_db.reset(token)
+            route = metrics.lookup(scope)
+            route.duration.observe(elapsed)
+            route.db_queries.observe(request_db.queries)
+            route.db_duration.observe(request_db.seconds)
+            route.statuses[min(max(status // 100, 1), 5)].inc()
+            if raised:
+                route.exceptions.inc()
+
+
+def instrument_engine(engine):
+    # Statement timings via cursor events; `engine` is a sync Engine (use
+    # AsyncEngine.sync_engine for the async one).
+    from sqlalchemy import event
+
+    query_duration = db_query_duration.labels()
+    errors = db_errors.labels()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_metrics_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        query_duration.observe(elapsed)
+        request_db = _request_db.get()
+        if request_db is not None:
+            request_db.queries += 1
+            request_db.seconds += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        errors.inc()
+
+
+class timed:
+    # with timed(histogram): ...  (histogram is a pre-created child)
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+def in_flight_collector():
+    yield (
+        "http_requests_in_flight",
+        "gauge",
+        "Requests currently being served",
+        [({}, http_metrics.in_flight)],
+    )
+
+
+registry.add_collector(in_flight_collector)
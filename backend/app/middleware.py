@@ -0,0 +1,55 @@
+# backend/app/middleware.py
+#
+# Plain ASGI middleware: headers are appended to the http.response.start
+# message as pre-encoded tuples. Unlike BaseHTTPMiddleware there is no extra
+# task or memory stream per request, and streamed bodies pass through
+# untouched.
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+SECURITY_HEADERS = (
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"strict-transport-security", b"max-age=31536000; includeSubDomains"),
+)
+
+# Default caching policy for routes that do not set Cache-Control themselves
+NO_STORE_HEADERS = (
+    (b"cache-control", b"no-store, no-cache, must-revalidate, max-age=0"),
+    (b"pragma", b"no-cache"),
+)
+
+
+class HeaderMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        security_headers=SECURITY_HEADERS,
+        default_cache_headers=NO_STORE_HEADERS,
+    ):
+        self.app = app
+        self.security_headers = list(security_headers)
+        self.default_cache_headers = list(default_cache_headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        security_headers = self.security_headers
+        default_cache_headers = self.default_cache_headers
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                for name, _ in headers:
+                    if name == b"cache-control":
+                        headers.extend(security_headers)
+                        break
+                else:
+                    headers.extend(security_headers)
+                    headers.extend(default_cache_headers)
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,241 @@
+# backend/app/migrations.py
+#
+# Versioned schema bootstrap. Applied once per deploy/process start, either from
+# the FastAPI lifespan or explicitly:
+#
+#     python -m backend.app.migrations            # apply pending migrations
+#     python -m backend.app.migrations --status   # list applied/pending versions
+import argparse
+import logging
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+
+import backend.app.models  # noqa: F401  registers every table on Base.metadata
+from backend.app.database import Base, db
+from backend.app.models import Hero, HeroBlob, RefreshToken, StorageOutbox, User
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary constant used to serialize concurrent bootstraps (several workers
+# starting at once) on Postgres.
+MIGRATION_LOCK_KEY = 72110001
+
+migration_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String),
+    Column("applied_at", DateTime, default=datetime.utcnow),
+)
+
+MIGRATIONS = []
+
+
+def migration(version: int, description: str):
+    def decorator(fn):
+        MIGRATIONS.append((version, description, fn))
+        return fn
+
+    return decorator
+
+
+# Migrations must be idempotent: a fresh database gets the current models from
+# the baseline, so later steps only change what is actually missing.
+
+
+def _add_column_if_missing(conn, column):
+    table = column.table.name
+    if column.name in {c["name"] for c in inspect(conn).get_columns(table)}:
+        return
+    column_type = column.type.compile(dialect=conn.dialect)
+    ddl = f'ALTER TABLE "{table}" ADD COLUMN "{column.name}" {column_type}'
+    if column.server_default is not None:
+        ddl += f" DEFAULT {column.server_default.arg}"
+    if not column.nullable:
+        ddl += " NOT NULL"
+    conn.execute(text(ddl))
+
+
+def _create_indexes(conn, table):
+    # Indexes on columns added by a later migration are created by that one.
+    existing = {c["name"] for c in inspect(conn).get_columns(table.name)}
+    for index in table.indexes:
+        if {c.name for c in index.columns} <= existing:
+            index.create(conn, checkfirst=True)
+
+
+@migration(1, "baseline schema")
+def _baseline(conn):
+    Base.metadata.create_all(bind=conn)
+
+
+@migration(2, "HeroTable (user_id, id) index and one active hero per user")
+def _hero_indexes(conn):
+    _create_indexes(conn, Hero.__table__)
+
+    # Keep the newest active hero if older data has several per user.
+    conn.execute(
+        text(
+            'UPDATE "HeroTable" SET active_img = false '
+            'WHERE active_img AND id NOT IN '
+            '(SELECT max(id) FROM "HeroTable" WHERE active_img GROUP BY user_id)'
+        )
+    )
+
+    if conn.dialect.name == "postgresql":
+        # Deferrable, so the activation UPDATE can flip the old and the new row
+        # in one statement; checked at the end of each statement.
+        exists = conn.execute(
+            text("SELECT 1 FROM pg_constraint WHERE conname = 'one_active_hero_per_user'")
+        ).first()
+        if not exists:
+            conn.execute(
+                text(
+                    'ALTER TABLE "HeroTable" ADD CONSTRAINT one_active_hero_per_user '
+                    "EXCLUDE USING btree (user_id WITH =) WHERE (active_img) "
+                    "DEFERRABLE INITIALLY IMMEDIATE"
+                )
+            )
+    else:
+        # Predicate spelled the way SQLAlchemy renders "active_img == True" on
+        # SQLite, otherwise the planner cannot use the partial index.
+        indexes = {index["name"] for index in inspect(conn).get_indexes("HeroTable")}
+        if "uq_HeroTable_one_active_per_user" not in indexes:
+            conn.execute(
+                text(
+                    'CREATE UNIQUE INDEX "uq_HeroTable_one_active_per_user" '
+                    'ON "HeroTable" (user_id) WHERE active_img = 1'
+                )
+            )
+
+
+@migration(3, "users.hero_version for hero ETags")
+def _hero_version(conn):
+    _add_column_if_missing(conn, User.__table__.c.hero_version)
+
+
+@migration(4, "HeroTable.variants for image derivatives")
+def _hero_variants(conn):
+    _add_column_if_missing(conn, Hero.__table__.c.variants)
+
+
+@migration(5, "hero_blobs and HeroTable.blob_key for upload deduplication")
+def _hero_blobs(conn):
+    HeroBlob.__table__.create(conn, checkfirst=True)
+    _add_column_if_missing(conn, Hero.__table__.c.blob_key)
+    _create_indexes(conn, Hero.__table__)
+
+    # The column is added without its constraint; give upgraded Postgres
+    # databases the same foreign key create_all produces on fresh ones (named
+    # as Postgres names it there). SQLite cannot add a constraint to an
+    # existing table without rebuilding it, so upgraded SQLite databases
+    # (development only) go without it.
+    if conn.dialect.name == "postgresql":
+        has_fk = any(
+            fk["constrained_columns"] == ["blob_key"]
+            for fk in inspect(conn).get_foreign_keys("HeroTable")
+        )
+        if not has_fk:
+            conn.execute(
+                text(
+                    'ALTER TABLE "HeroTable" ADD CONSTRAINT "HeroTable_blob_key_fkey" '
+                    "FOREIGN KEY (blob_key) REFERENCES hero_blobs (key)"
+                )
+            )
+
+
+@migration(6, "HeroTable.created_at for age-based cleanup")
+def _hero_created_at(conn):
+    _add_column_if_missing(conn, Hero.__table__.c.created_at)
+    # Existing heroes count as created now, so age filters never match them early
+    conn.execute(
+        text('UPDATE "HeroTable" SET created_at = :now WHERE created_at IS NULL'),
+        {"now": datetime.utcnow()},
+    )
+    _create_indexes(conn, Hero.__table__)
+
+
+@migration(7, "storage_outbox for deferred object deletion")
+def _storage_outbox(conn):
+    StorageOutbox.__table__.create(conn, checkfirst=True)
+
+
+@migration(8, "refresh_tokens for rotating refresh tokens")
+def _refresh_tokens(conn):
+    RefreshToken.__table__.create(conn, checkfirst=True)
+
+
+@migration(9, "users lower(email) index for case-insensitive email uniqueness")
+def _users_email_lower(conn):
+    # Fresh databases already have it from the baseline (hence IF NOT EXISTS;
+    # the SQLite inspector does not list expression indexes). Emails already
+    # registered twice in different case cannot get the unique index; they
+    # still get the lookup index and are reported.
+    duplicates = conn.execute(
+        text(
+            "SELECT count(*) FROM "
+            "(SELECT 1 FROM users GROUP BY lower(email) HAVING count(*) > 1) d"
+        )
+    ).scalar()
+    if duplicates:
+        logger.warning(
+            "%s emails are registered more than once with different case; "
+            "ix_users_email_lower created without UNIQUE",
+            duplicates,
+        )
+    unique = "" if duplicates else "UNIQUE "
+    conn.execute(
+        text(f"CREATE {unique}INDEX IF NOT EXISTS ix_users_email_lower ON users (lower(email))")
+    )
+
+
+def applied_versions(conn):
+    schema_migrations.create(conn, checkfirst=True)
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def run_migrations(bind=None):
+    with (bind or db.engine).begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(
+                text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY}
+            )
+        applied = applied_versions(conn)
+        pending = [m for m in sorted(MIGRATIONS, key=lambda m: m[0]) if m[0] not in applied]
+        for version, description, fn in pending:
+            fn(conn)
+            conn.execute(
+                schema_migrations.insert().values(
+                    version=version,
+                    description=description,
+                    applied_at=datetime.utcnow(),
+                )
+            )
+            logger.info("Applied migration %s: %s", version, description)
+    return [version for version, _, _ in pending]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply database schema migrations")
+    parser.add_argument("--status", action="store_true", help="only report versions")
+    args = parser.parse_args(argv)
+
+    if args.status:
+        with db.engine.begin() as conn:
+            applied = applied_versions(conn)
+        for version, description, _ in sorted(MIGRATIONS, key=lambda m: m[0]):
+            state = "applied" if version in applied else "pending"
+            print(f"{version:>4}  {state:<8} {description}")
+        return
+
+    applied = run_migrations(db.engine)
+    if applied:
+        print(f"Applied migrations: {', '.join(map(str, applied))}")
+    else:
+        print("Schema is up to date.")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,8 @@ from sqlalchemy.orm import relationship
 
 from sqlalchemy import (
     Column,
+    Index,
+    func,
     Integer,
     String,
     DateTime,
@@ -19,10 +21,16 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String, unique=True, index=True)
     email = Column(String, unique=True, index=True)
+    # Emails are also unique regardless of case, for /register and the bulk
+    # provisioning CLI alike (which looks them up by lower(email)).
+    __table_args__ = (Index("ix_users_email_lower", func.lower(email), unique=True),)
     hashed_password = Column(String)
     registration_date = Column(DateTime, default=datetime.utcnow)
     is_email_verified = Column(Boolean, default=False)
     email_verification_code = Column(String)
+    # Bumped in the same transaction as every change to the user's heroes;
+    # hero read ETags are derived from it.
+    hero_version = Column(Integer, nullable=False, default=0, server_default="0")
     
     
     HeroTable = relationship("Hero", back_populates="user")
@@ -1,13 +1,41 @@
 # backend/app/models/Hero.py
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, String, Boolean, ForeignKey, Index, JSON
 from ..database import Base
 from sqlalchemy.orm import relationship
 
 
 class Hero(Base):
     __tablename__ = "HeroTable"
+    # "At most one active hero per user" is dialect specific (see migration 2):
+    # a deferrable exclusion constraint on Postgres, a partial unique index elsewhere.
+    __table_args__ = (
+        Index("ix_HeroTable_user_id_id", "user_id", "id"),
+        Index("ix_HeroTable_blob_key", "blob_key"),
+        Index("ix_HeroTable_user_id_created_at", "user_id", "created_at"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     image = Column(String)
     active_img = Column(Boolean, default=False)
     user_id = Column(Integer, ForeignKey("users.id"))
+    # Resized/re-encoded derivatives: [{"width", "format", "url", "path"}]
+    variants = Column(JSON)
+    # Content-addressed object behind `image`; NULL for heroes uploaded before
+    # deduplication, which still own their name-based object.
+    blob_key = Column(String(64), ForeignKey("hero_blobs.key"))
+    created_at = Column(DateTime, default=datetime.utcnow)
     user = relationship("User", back_populates="HeroTable")
+
+
+class HeroBlob(Base):
+    # One stored object per distinct image content, shared by every hero that
+    # uploaded the same bytes.
+    __tablename__ = "hero_blobs"
+
+    key = Column(String(64), primary_key=True)  # sha256 of the content
+    path = Column(String, nullable=False)
+    content_type = Column(String)
+    size = Column(Integer)
+    ref_count = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,21 @@
+# backend/app/models/RefreshTokenModel.py
+from datetime import datetime
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+from ..database import Base
+
+
+class RefreshToken(Base):
+    # One row per login session ("family"), updated in place on every refresh:
+    # only the current generation's token is valid and only its HMAC is kept
+    # (see utils/refresh_tokens.py).
+    __tablename__ = "refresh_tokens"
+    __table_args__ = (Index("ix_refresh_tokens_user_id_expires_at", "user_id", "expires_at"),)
+
+    id = Column(String(32), primary_key=True)  # random family id, part of the token
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    generation = Column(Integer, nullable=False, default=0, server_default="0")
+    token_hash = Column(String(64), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    refreshed_at = Column(DateTime)
@@ -0,0 +1,19 @@
+# backend/app/models/StorageOutboxModel.py
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Index, Integer, String
+from ..database import Base
+
+
+class StorageOutbox(Base):
+    # Storage deletions recorded in the same transaction as the rows that
+    # stopped referencing the objects; drained by utils/storage_outbox.py.
+    __tablename__ = "storage_outbox"
+    __table_args__ = (Index("ix_storage_outbox_next_attempt_at", "next_attempt_at"),)
+
+    id = Column(Integer, primary_key=True)
+    path = Column(String, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    # NULL once attempts are exhausted; such rows stay for inspection
+    next_attempt_at = Column(DateTime, default=datetime.utcnow)
+    last_error = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
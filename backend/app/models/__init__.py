@@ -5,4 +5,6 @@ __all__ = ["base_image"]
 
 
 from .HeroModel import *
-from .DasModelAdmin import *
\ No newline at end of file
+from .DasModelAdmin import *
+from .StorageOutboxModel import *
+from .RefreshTokenModel import *
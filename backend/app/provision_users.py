@@ -0,0 +1,220 @@
+# backend/app/provision_users.py
+#
+# Bulk user provisioning from a CSV file with a header row of
+# username,email,password (an optional "verified" column overrides --verified
+# per row):
+#
+#     python -m backend.app.provision_users users.csv [--verified]
+#         [--workers 8] [--batch-size 1000] [--send-verification]
+#
+# Rows whose username or email already exists (emails compared without
+# case) are skipped before hashing; bcrypt runs in a process pool while the
+# previous batch is being written. Each batch is one multi-row INSERT with
+# ON CONFLICT DO NOTHING for anything created concurrently, so a partial run
+# can simply be repeated.
+import argparse
+import csv
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from pydantic import ValidationError
+from sqlalchemy import func, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from backend.app.database import db
+from backend.app.models import User
+from backend.app.schemas.DasSchemasAdmin import UserCreate
+from backend.app.utils.authenticate import generate_verification_code, send_email_verification
+from backend.app.utils.email_sender import email_sender
+
+PROVISION_BATCH_SIZE = 1000
+UPSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+TRUE_VALUES = {"1", "true", "t", "yes", "y"}
+
+
+def hash_passwords(passwords):
+    # Runs in the worker processes; same scheme as utils/hashing.py
+    from passlib.context import CryptContext
+
+    context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return [context.hash(password) for password in passwords]
+
+
+def read_users(path: str, verified: bool, errors: list):
+    # Yields validated rows; duplicates within the file keep the first one.
+    seen_usernames, seen_emails = set(), set()
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for line, record in enumerate(csv.DictReader(f), start=2):
+            try:
+                user = UserCreate.model_validate(record)
+            except ValidationError as exc:
+                errors.append((line, exc.errors()[0]["msg"]))
+                continue
+            email = user.email.lower()
+            if user.username in seen_usernames or email in seen_emails:
+                errors.append((line, "duplicate of an earlier row"))
+                continue
+            seen_usernames.add(user.username)
+            seen_emails.add(email)
+            flag = (record.get("verified") or "").strip().lower()
+            yield user, flag in TRUE_VALUES if flag else verified
+
+
+def batches(rows, size: int):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def drop_existing(batch):
+    # Rows whose username or email is taken are skipped before hashing, so
+    # re-running an import only pays bcrypt for what is new.
+    # Emails are compared lowercased, as read_users does within the file
+    # (an indexed lookup on ix_users_email_lower).
+    usernames = [user.username for user, _ in batch]
+    emails = [user.email.lower() for user, _ in batch]
+    with db.engine.connect() as conn:
+        taken = conn.execute(
+            select(User.username, User.email).where(
+                or_(User.username.in_(usernames), func.lower(User.email).in_(emails))
+            )
+        ).all()
+    taken_usernames = {username for username, _ in taken}
+    taken_emails = {email.lower() for _, email in taken}
+    return [
+        (user, verified)
+        for user, verified in batch
+        if user.username not in taken_usernames and user.email.lower() not in taken_emails
+    ]
+
+
+def hash_batch(executor, workers: int, batch):
+    # Split so every worker gets a share; returns a future per chunk.
+    passwords = [user.password for user, _ in batch]
+    chunk = max(1, -(-len(passwords) // workers))
+    return [
+        executor.submit(hash_passwords, passwords[start : start + chunk])
+        for start in range(0, len(passwords), chunk)
+    ]
+
+
+def build_rows(batch, hashes):
+    now = datetime.utcnow()
+    return [
+        {
+            "username": user.username,
+            "email": user.email,
+            "hashed_password": hashed,
+            "registration_date": now,
+            "is_email_verified": verified,
+            "email_verification_code": None if verified else generate_verification_code(),
+        }
+        for (user, verified), hashed in zip(batch, hashes)
+    ]
+
+
+def insert_rows(conn, rows):
+    insert = UPSERTS.get(conn.dialect.name)
+    if insert is None:
+        raise SystemExit(f"Bulk provisioning does not support {conn.dialect.name}")
+    return set(
+        conn.execute(
+            insert(User).values(rows).on_conflict_do_nothing().returning(User.username)
+        ).scalars()
+    )
+
+
+def load_batch(rows):
+    with db.engine.begin() as conn:
+        return insert_rows(conn, rows)
+
+
+def provision(args):
+    errors = []
+    inserted = skipped = 0
+    started = time.perf_counter()
+    send = args.send_verification
+    if send:
+        email_sender.start()
+
+    def write(batch, futures):
+        nonlocal inserted, skipped
+        if not batch:
+            return
+        hashes = [hashed for future in futures for hashed in future.result()]
+        rows = build_rows(batch, hashes)
+        created = load_batch(rows)
+        inserted += len(created)
+        skipped += len(rows) - len(created)
+        if send:
+            for row in rows:
+                if row["username"] in created and row["email_verification_code"]:
+                    send_email_verification(row["email"], row["email_verification_code"])
+        print(
+            f"\r{inserted} inserted, {skipped} already present, {len(errors)} invalid",
+            end="",
+            file=sys.stderr,
+        )
+
+    with ProcessPoolExecutor(
+        max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        pending = None
+        for batch in batches(read_users(args.csv, args.verified, errors), args.batch_size):
+            new = drop_existing(batch)
+            skipped += len(batch) - len(new)
+            # Hash the next batch while the current one is written
+            job = (new, hash_batch(executor, args.workers, new))
+            if pending is not None:
+                write(*pending)
+            pending = job
+        if pending is not None:
+            write(*pending)
+    print(file=sys.stderr)
+
+    if send:
+        email_sender.stop()
+        if email_sender.dropped:
+            print(
+                f"{email_sender.dropped} verification emails dropped (EMAIL_QUEUE_SIZE)",
+                file=sys.stderr,
+            )
+    elapsed = time.perf_counter() - started
+    for line, message in errors:
+        print(f"line {line}: {message}", file=sys.stderr)
+    total = inserted + skipped
+    print(
+        f"Inserted {inserted} users, skipped {skipped} existing, {len(errors)} invalid rows "
+        f"in {elapsed:.1f} s ({total / elapsed if elapsed else 0:.0f} rows/s)"
+    )
+    return inserted, skipped, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Create users in bulk from a CSV file")
+    parser.add_argument("csv", help="file with username,email,password[,verified] columns")
+    parser.add_argument("--verified", action="store_true", help="mark emails as verified")
+    parser.add_argument(
+        "--send-verification",
+        action="store_true",
+        help="email verification codes to the unverified users created",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=PROVISION_BATCH_SIZE)
+    args = parser.parse_args(argv)
+    _, _, errors = provision(args)
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,50 +2,91 @@
 
 
 from datetime import timedelta
-from fastapi import APIRouter,HTTPException, Depends,status
+from fastapi import APIRouter,HTTPException, Depends, Query, Request,status
+from backend.app import db_profile, startup
 from fastapi.security import OAuth2PasswordRequestForm
-from backend.app.database import get_db
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from backend.app.database import db as database, get_async_db, get_db
 from backend.app.models.DasModelAdmin import User
 from backend.app.schemas.DasSchemasAdmin import UserCreate, UserInDB
 from backend.app.schemas.Verif import VerificationRequest
-from backend.app.utils.authenticate import authenticate_user, create_access_token, generate_verification_code, get_current_user, get_password_hash, send_email_verification
+from backend.app.routes.HeroRoute import active_hero_cache
+from backend.app.utils.email_sender import email_sender
+from backend.app.utils.hashing import password_hasher
+from backend.app.utils.image_variants import image_variant_pipeline
+from backend.app.utils.storage_outbox import storage_outbox
+from backend.app.utils.principal_cache import principal_cache
+from backend.app.utils.rate_limit import rate_limit_stats, register_throttle
+from backend.app.utils.authenticate import authenticate_user, create_access_token, generate_verification_code, get_admin_user, get_current_user, get_password_hash, send_email_verification
 
 prefix = "/admin"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
 router = APIRouter(prefix=prefix, tags=["Admin"])
 
 
-@router.post("/register", response_model=UserInDB)
-def register_user(user: UserCreate, db=Depends(get_db)):
-    db_user = db.query(User).filter(User.username == user.username).first()
-    if db_user:
-        raise HTTPException(status_code=400, detail="Username already registered")
+# Unique indexes on users (see models/DasModelAdmin.py) -> API error
+REGISTRATION_CONFLICTS = {
+    "ix_users_username": "Username already registered",
+    "ix_users_email": "Email already registered",
+    "ix_users_email_lower": "Email already registered",
+}
+SQLITE_REGISTRATION_CONFLICTS = {
+    "users.username": REGISTRATION_CONFLICTS["ix_users_username"],
+    "users.email": REGISTRATION_CONFLICTS["ix_users_email"],
+    "ix_users_email_lower": REGISTRATION_CONFLICTS["ix_users_email_lower"],
+}
+
 
-    db_email = db.query(User).filter(User.email == user.email).first()
-    if db_email:
-        raise HTTPException(status_code=400, detail="Email already registered")
+def registration_conflict(exc: IntegrityError) -> str:
+    # asyncpg (Postgres) names the violated index on the driver exception
+    # chained behind SQLAlchemy's adapter; SQLite only has the message,
+    # "UNIQUE constraint failed: users.<column>" (or "index '<name>'" for
+    # the lower(email) expression index).
+    constraint = getattr(exc.orig.__cause__, "constraint_name", None)
+    if constraint is not None:
+        if constraint in REGISTRATION_CONFLICTS:
+            return REGISTRATION_CONFLICTS[constraint]
+        raise exc
+    message = str(exc.orig)
+    for column, detail in SQLITE_REGISTRATION_CONFLICTS.items():
+        if column in message:
+            return detail
+    raise exc
 
-    hashed_password = get_password_hash(user.password)
+
+@router.post("/register", response_model=UserInDB)
+async def register_user(user: UserCreate, request: Request, db=Depends(get_async_db)):
+    register_throttle.check(request, user.username)
+    # No existence checks: the unique indexes decide, in the same statement
+    # that creates the row (one INSERT ... RETURNING and the commit).
+    hashed_password = await password_hasher.hash_async(user.password)
     email_code = generate_verification_code()
 
-    new_user = User(
-        username=user.username,
-        email=user.email,
-        hashed_password=hashed_password,
-        email_verification_code=email_code,
-    )
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    try:
+        new_user = (
+            await db.execute(
+                insert(User)
+                .values(
+                    username=user.username,
+                    email=user.email,
+                    hashed_password=hashed_password,
+                    email_verification_code=email_code,
+                )
+                .returning(User.id, User.registration_date, User.is_email_verified)
+            )
+        ).one()
+        await db.commit()
+    except IntegrityError as exc:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=registration_conflict(exc))
 
-    # Send verification codes
+    # Queue the verification code; delivery happens off the request path
     send_email_verification(user.email, email_code)
-    db.commit()
 
     return UserInDB(
         id=new_user.id,
-        username=new_user.username,
-        email=new_user.email,
+        username=user.username,
+        email=user.email,
         registration_date=new_user.registration_date,
         is_email_verified=new_user.is_email_verified,
     )
@@ -59,6 +100,7 @@ def verify_email(verification: VerificationRequest, db=Depends(get_db)):
         raise HTTPException(status_code=400, detail="Invalid verification code")
     user.is_email_verified = True
     db.commit()
+    principal_cache.invalidate_user(user.username)
     return {"msg": "Email verified successfully"}
 
 
@@ -73,3 +115,64 @@ async def read_users_me(current_user: User = Depends(get_current_user)):
         is_email_verified=current_user.is_email_verified,
 
     )
+
+
+@router.get("/pool-stats")
+async def read_pool_stats(current_user: User = Depends(get_admin_user)):
+    return database.pool_stats()
+
+
+@router.get("/hash-stats")
+async def read_hash_stats(current_user: User = Depends(get_admin_user)):
+    return password_hasher.stats()
+
+
+@router.get("/principal-cache-stats")
+async def read_principal_cache_stats(current_user: User = Depends(get_admin_user)):
+    return principal_cache.stats()
+
+
+@router.get("/email-stats")
+async def read_email_stats(current_user: User = Depends(get_admin_user)):
+    return email_sender.stats()
+
+
+@router.get("/active-hero-cache-stats")
+async def read_active_hero_cache_stats(current_user: User = Depends(get_admin_user)):
+    return active_hero_cache.stats()
+
+
+@router.get("/image-variant-stats")
+async def read_image_variant_stats(current_user: User = Depends(get_admin_user)):
+    return image_variant_pipeline.stats()
+
+
+@router.get("/storage-outbox-stats")
+async def read_storage_outbox_stats(current_user: User = Depends(get_admin_user)):
+    return await storage_outbox.stats()
+
+
+@router.get("/rate-limit-stats")
+async def read_rate_limit_stats(current_user: User = Depends(get_admin_user)):
+    return rate_limit_stats()
+
+
+@router.get("/startup-report")
+async def read_startup_report(current_user: User = Depends(get_admin_user)):
+    if startup.latest_report is None:
+        raise HTTPException(status_code=404, detail="Startup has not finished")
+    return startup.latest_report.as_dict()
+
+
+@router.get("/db-profile")
+async def read_db_profile(
+    top: int = Query(20, ge=1, le=500),
+    reset: bool = False,
+    current_user: User = Depends(get_admin_user),
+):
+    if not db_profile.DB_PROFILE_ENABLED:
+        raise HTTPException(status_code=404, detail="DB profiling is disabled (set DB_PROFILE=true)")
+    summary = db_profile.db_profiler.summary(top)
+    if reset:
+        db_profile.db_profiler.reset()
+    return summary
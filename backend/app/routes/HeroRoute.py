@@ -1,61 +1,149 @@
 # backend/app/routers/hero.py
-from typing import List
-from fastapi import APIRouter, File, UploadFile, HTTPException, Depends
-
-from backend.app.database import get_db
+import asyncio
+import base64
+import binascii
+import hashlib
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import List, Optional
+from fastapi import APIRouter, File, UploadFile, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+
+from backend.app.database import db as database, get_async_db
 from backend.app.models.DasModelAdmin import User
-from backend.app.schemas.HeroSchemas import HeroInDB, HeroModel
+from backend.app.schemas.HeroSchemas import (
+    BulkDeleteRequest,
+    BulkDeleteResponse,
+    BulkUploadResponse,
+    BulkUploadResult,
+    StorageDeleteError,
+    HeroInDB,
+    HeroModel,
+)
 from backend.app.utils.authenticate import get_current_user
+from backend.app.utils.active_hero_cache import (
+    ACTIVE_HERO_CACHE_SIZE,
+    ACTIVE_HERO_FRESH_TTL,
+    ACTIVE_HERO_STALE_TTL,
+    ActiveHeroCache,
+)
+from backend.app.utils.http_cache import bump_hero_version, hero_etag, not_modified, set_cache_headers
 
 prefix = "/hero"
 
 router = APIRouter(prefix=prefix, tags=["Heroes"])
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..models import Hero
-from ..utils.file_operations import upload_file, delete_file
+from ..utils.file_operations import prepare_upload
+from ..utils.hero_blobs import (
+    acquire_blob,
+    acquire_blobs,
+    hero_object_paths,
+    release_blob,
+    release_blobs,
+    shared_variants,
+    shared_variants_many,
+)
+from ..utils.image_variants import image_variant_pipeline
+from ..utils.storage_outbox import enqueue_deletes, storage_outbox
 
 from sqlalchemy.exc import SQLAlchemyError
 
 # Configuration
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg"}
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50 MB
-ALLOWED_MIME_TYPES = {
-    "text/plain",
-    "application/pdf",
-    "image/png",
-    "image/jpeg",
-    "image/gif",
-}
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+EXPORT_BATCH_SIZE = 500
+BULK_UPLOAD_MAX_FILES = int(os.getenv("BULK_UPLOAD_MAX_FILES", "50"))
+# Storage transfers in flight per bulk request
+BULK_UPLOAD_CONCURRENCY = int(os.getenv("BULK_UPLOAD_CONCURRENCY", "8"))
+# CDN-friendly policy for the public active-hero endpoint
+PUBLIC_ACTIVE_HERO_CACHE_CONTROL = (
+    f"public, max-age={int(ACTIVE_HERO_FRESH_TTL)}, "
+    f"stale-while-revalidate={int(ACTIVE_HERO_STALE_TTL)}, stale-if-error=86400"
+)
+PUBLIC_NO_ACTIVE_HERO_CACHE_CONTROL = "public, max-age=10"
 
 
 def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+# Keyset cursors are opaque to clients: the last hero id of the page.
+def encode_cursor(hero_id: int) -> str:
+    return base64.urlsafe_b64encode(f"h:{hero_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        kind, hero_id = raw.split(":", 1)
+        if kind != "h":
+            raise ValueError(cursor)
+        return int(hero_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def to_hero_model(hero):
+    return HeroModel(
+        id=hero.id,
+        image_url=hero.image,
+        active_img=hero.active_img,
+        variants=hero.variants or [],
+    )
+
+
+async def load_active_hero(user_id: int):
+    async with database.AsyncSessionLocal() as session:
+        hero = await session.scalar(
+            select(Hero).where(Hero.user_id == user_id, Hero.active_img == True)
+        )
+    if hero is None:
+        return None
+    return to_hero_model(hero)
+
+
+active_hero_cache = ActiveHeroCache(
+    load_active_hero,
+    fresh_ttl=ACTIVE_HERO_FRESH_TTL,
+    stale_ttl=ACTIVE_HERO_STALE_TTL,
+    max_size=ACTIVE_HERO_CACHE_SIZE,
+)
+
+
 @router.post("/upload/", response_model=HeroInDB)
 async def upload_image(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     try:
         if not allowed_file(file.filename):
             raise HTTPException(status_code=400, detail="File type not allowed")
 
-        content = await file.read()
-        if len(content) > MAX_FILE_SIZE:
-            raise HTTPException(status_code=400, detail="File too large")
-
-        if file.content_type not in ALLOWED_MIME_TYPES:
-            raise HTTPException(status_code=400, detail="Invalid file content")
+        prepared = await prepare_upload(file, MAX_FILE_SIZE)
+        public_url, path, reused = await acquire_blob(db, prepared, prefix.strip("/"))
+        variants = await shared_variants(db, prepared.digest) if reused else None
 
-        await file.seek(0)  # Reset file pointer
-        public_url, _ = await upload_file(file, prefix.strip("/"))
-
-        db_image = Hero(image=public_url, active_img=False, user_id=current_user.id)
+        db_image = Hero(
+            image=public_url,
+            active_img=False,
+            user_id=current_user.id,
+            blob_key=prepared.digest,
+            variants=variants,
+        )
         db.add(db_image)
-        db.commit()
-        db.refresh(db_image)
+        await bump_hero_version(db, current_user.id)
+        await db.commit()
+
+        if not variants:
+            image_variant_pipeline.schedule(
+                db_image.id, path, public_url, on_update=active_hero_cache.invalidate
+            )
 
         return HeroInDB(
             user_id=current_user.id,
@@ -64,85 +152,290 @@ async def upload_image(
             active_img=db_image.active_img,
         )
     except SQLAlchemyError:
-        db.rollback()
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Database error occurred")
+
+@router.post("/upload/bulk/", response_model=BulkUploadResponse)
+async def upload_images_bulk(
+    files: List[UploadFile] = File(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    if len(files) > BULK_UPLOAD_MAX_FILES:
+        raise HTTPException(
+            status_code=400, detail=f"At most {BULK_UPLOAD_MAX_FILES} files per request"
+        )
+
+    # Every file is validated and hashed first; failures are reported per file
+    # and do not stop the rest of the batch.
+    async def validate(file):
+        if not allowed_file(file.filename or ""):
+            raise HTTPException(status_code=400, detail="File type not allowed")
+        return await prepare_upload(file, MAX_FILE_SIZE)
+
+    checked = await asyncio.gather(*(validate(file) for file in files), return_exceptions=True)
+    results = [BulkUploadResult(filename=file.filename or "", ok=False) for file in files]
+    accepted = []
+    for result, outcome in zip(results, checked):
+        if isinstance(outcome, HTTPException):
+            result.error = outcome.detail
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            accepted.append((result, outcome))
+
+    if not accepted:
+        return BulkUploadResponse(uploaded=0, failed=len(results), results=results)
+
+    try:
+        acquired, errors = await acquire_blobs(
+            db, [prepared for _, prepared in accepted], prefix.strip("/"), BULK_UPLOAD_CONCURRENCY
+        )
+        reused = [digest for digest, (_, _, hit) in acquired.items() if hit]
+        variants = await shared_variants_many(db, reused) if reused else {}
+
+        created = []
+        for result, prepared in accepted:
+            if prepared.digest in errors:
+                result.error = errors[prepared.digest]
+                continue
+            public_url, path, hit = acquired[prepared.digest]
+            hero = Hero(
+                image=public_url,
+                active_img=False,
+                user_id=current_user.id,
+                blob_key=prepared.digest,
+                variants=variants.get(prepared.digest),
+            )
+            created.append((result, hero, path, hit))
+
+        # One transaction (and one batched INSERT) for the whole request
+        db.add_all(hero for _, hero, _, _ in created)
+        await bump_hero_version(db, current_user.id)
+        await db.commit()
+    except SQLAlchemyError:
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Database error occurred")
 
+    seen = set()
+    for result, hero, path, hit in created:
+        result.ok = True
+        # Repeats within the batch share the first copy's transfer
+        result.deduplicated = hit or path in seen
+        result.hero = HeroInDB(
+            id=hero.id, user_id=hero.user_id, image_url=hero.image, active_img=hero.active_img
+        )
+        if path in seen:
+            continue
+        seen.add(path)
+        if not hero.variants:
+            image_variant_pipeline.schedule(
+                hero.id, path, hero.image, on_update=active_hero_cache.invalidate
+            )
+
+    uploaded = len(created)
+    return BulkUploadResponse(uploaded=uploaded, failed=len(results) - uploaded, results=results)
+
+
 @router.get("/", response_model=List[HeroModel])
 async def get_images(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     try:
-        images = db.query(Hero).filter(Hero.user_id == current_user.id).all()
+        etag = await hero_etag(db, current_user.id, "list", limit, after)
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return cached
+
+        query = select(Hero).where(Hero.user_id == current_user.id)
+        if after is not None:
+            query = query.where(Hero.id > decode_cursor(after))
+        # One extra row tells whether another page exists
+        images = (await db.scalars(query.order_by(Hero.id).limit(limit + 1))).all()
+
+        if len(images) > limit:
+            images = images[:limit]
+            next_cursor = encode_cursor(images[-1].id)
+            next_url = request.url.include_query_params(after=next_cursor, limit=limit)
+            response.headers["X-Next-Cursor"] = next_cursor
+            response.headers["Link"] = f'<{next_url}>; rel="next"'
+        set_cache_headers(response, etag)
+
         return [
-            HeroModel(id=image.id, image_url=image.image, active_img=image.active_img)
+            to_hero_model(image)
             for image in images
         ]
     except SQLAlchemyError:
         raise HTTPException(status_code=500, detail="Database error occurred")
 
 
+@router.get("/export/")
+async def export_images(
+    format: str = Query("ndjson", pattern="^(ndjson|json)$"),
+    current_user: User = Depends(get_current_user),
+):
+    # Rows come from a server-side cursor in batches and are written out as
+    # they arrive; the full history is never held in memory. The stream owns
+    # its session, since it outlives the request's dependencies.
+    user_id = current_user.id
+
+    async def rows():
+        async with database.AsyncSessionLocal() as session:
+            result = await session.stream_scalars(
+                select(Hero)
+                .where(Hero.user_id == user_id)
+                .order_by(Hero.id)
+                .execution_options(yield_per=EXPORT_BATCH_SIZE)
+            )
+            async for image in result:
+                yield to_hero_model(image).model_dump_json()
+
+    async def ndjson():
+        async for row in rows():
+            yield row + "\n"
+
+    async def json_array():
+        separator = "["
+        async for row in rows():
+            yield separator + row
+            separator = ","
+        yield "[]" if separator == "[" else "]"
+
+    if format == "json":
+        return StreamingResponse(json_array(), media_type="application/json")
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
 @router.get("/{image_id}", response_model=HeroModel)
 async def get_image(
     image_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     try:
-        image = (
-            db.query(Hero)
-            .filter(Hero.id == image_id, Hero.user_id == current_user.id)
-            .first()
+        etag = await hero_etag(db, current_user.id, "item", image_id)
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return cached
+
+        image = await db.scalar(
+            select(Hero).where(Hero.id == image_id, Hero.user_id == current_user.id)
         )
         if image is None:
             raise HTTPException(status_code=404, detail="Image not found")
-        return HeroModel(
-            id=image.id, image_url=image.image, active_img=image.active_img
-        )
+        set_cache_headers(response, etag)
+        return to_hero_model(image)
     except SQLAlchemyError:
         raise HTTPException(status_code=500, detail="Database error occurred")
 
 @router.delete("/{image_id}", response_model=HeroModel)
 async def delete_image(
     image_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     try:
-        db_image = (
-            db.query(Hero)
-            .filter(Hero.id == image_id, Hero.user_id == current_user.id)
-            .first()
+        db_image = await db.scalar(
+            select(Hero).where(Hero.id == image_id, Hero.user_id == current_user.id)
         )
         if not db_image:
             raise HTTPException(status_code=404, detail="Image not found")
 
-        filename = db_image.image.split("/")[-1].split("?")[0]
-        delete_file(prefix.strip("/"), filename)
+        released = None
+        if db_image.blob_key is not None:
+            released = await release_blob(db, db_image.blob_key)
+        if db_image.blob_key is None or released is not None:
+            await enqueue_deletes(
+                db, hero_object_paths(db_image.image, released, db_image.variants)
+            )
+        await db.delete(db_image)
+        await bump_hero_version(db, current_user.id)
+        await db.commit()
+        active_hero_cache.invalidate(current_user.id)
+        storage_outbox.notify()
+
+        return to_hero_model(db_image)
+    except SQLAlchemyError:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Database error occurred")
 
-        db.delete(db_image)
-        db.commit()
 
-        return HeroModel(
-            id=db_image.id, image_url=db_image.image, active_img=db_image.active_img
-        )
+@router.post("/delete/bulk/", response_model=BulkDeleteResponse)
+async def delete_images_bulk(
+    request: BulkDeleteRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user),
+):
+    query = delete(Hero).where(Hero.user_id == current_user.id)
+    if request.ids is not None:
+        query = query.where(Hero.id.in_(request.ids))
+    if request.inactive_older_than_days is not None:
+        cutoff = datetime.utcnow() - timedelta(days=request.inactive_older_than_days)
+        query = query.where(Hero.active_img == False, Hero.created_at < cutoff)
+
+    try:
+        # One set-based DELETE; the returned rows drive blob and storage cleanup
+        rows = (
+            await db.execute(
+                query.returning(
+                    Hero.id, Hero.image, Hero.blob_key, Hero.variants, Hero.active_img
+                ).execution_options(synchronize_session=False)
+            )
+        ).all()
+        if not rows:
+            await db.rollback()
+            return BulkDeleteResponse(deleted=0, ids=[], objects_removed=0, storage_errors=[])
+
+        counts = Counter(row.blob_key for row in rows if row.blob_key is not None)
+        released = await release_blobs(db, counts) if counts else {}
+
+        paths = []
+        for row in rows:
+            if row.blob_key is None:
+                paths += hero_object_paths(row.image, None, row.variants)
+            elif row.blob_key in released:
+                paths += hero_object_paths(row.image, released.pop(row.blob_key), row.variants)
+        paths = list(dict.fromkeys(paths))
+        outbox_ids = await enqueue_deletes(db, paths)
+
+        await bump_hero_version(db, current_user.id)
+        await db.commit()
     except SQLAlchemyError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Database error occurred")
 
+    if any(row.active_img for row in rows):
+        active_hero_cache.invalidate(current_user.id)
+
+    # Removed right away in batched storage calls so the response can report
+    # per-object results; failures stay in the outbox and are retried.
+    errors = await storage_outbox.flush(outbox_ids)
+
+    return BulkDeleteResponse(
+        deleted=len(rows),
+        ids=sorted(row.id for row in rows),
+        objects_removed=len(paths) - len(errors),
+        storage_errors=[StorageDeleteError(path=path, error=error) for path, error in errors.items()],
+    )
+
 
 @router.put("/{image_id}", response_model=HeroModel)
 async def update_image(
     image_id: int,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     try:
-        db_image = (
-            db.query(Hero)
-            .filter(Hero.id == image_id, Hero.user_id == current_user.id)
-            .first()
+        db_image = await db.scalar(
+            select(Hero).where(Hero.id == image_id, Hero.user_id == current_user.id)
         )
         if not db_image:
             raise HTTPException(status_code=404, detail="Image not found")
@@ -150,79 +443,128 @@ async def update_image(
         if not allowed_file(file.filename):
             raise HTTPException(status_code=400, detail="File type not allowed")
 
-        content = await file.read()
-        if len(content) > MAX_FILE_SIZE:
-            raise HTTPException(status_code=400, detail="File too large")
-
-        if file.content_type not in ALLOWED_MIME_TYPES:
-            raise HTTPException(status_code=400, detail="Invalid file content")
-
-        old_filename = db_image.image.split("/")[-1].split("?")[0]
-        delete_file(prefix.strip("/"), old_filename)
+        prepared = await prepare_upload(file, MAX_FILE_SIZE)
+        public_url, path, reused = await acquire_blob(db, prepared, prefix.strip("/"))
+        variants = await shared_variants(db, prepared.digest) if reused else None
 
-        await file.seek(0)  # Reset file pointer
-        public_url, _ = await upload_file(file, prefix.strip("/"))
+        old_image, old_key, old_variants = db_image.image, db_image.blob_key, db_image.variants
+        released = await release_blob(db, old_key) if old_key is not None else None
+        if old_key is None or released is not None:
+            await enqueue_deletes(db, hero_object_paths(old_image, released, old_variants))
         db_image.image = public_url
-        db.commit()
-        db.refresh(db_image)
-
-        return HeroModel(
-            id=db_image.id, image_url=db_image.image, active_img=db_image.active_img
-        )
+        db_image.blob_key = prepared.digest
+        db_image.variants = variants
+        await bump_hero_version(db, current_user.id)
+        await db.commit()
+        active_hero_cache.invalidate(current_user.id)
+        storage_outbox.notify()
+
+        if not variants:
+            image_variant_pipeline.schedule(
+                db_image.id, path, public_url, on_update=active_hero_cache.invalidate
+            )
+
+        return to_hero_model(db_image)
     except SQLAlchemyError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Database error occurred")
 
 @router.put("/activate/{hero_id}", response_model=HeroModel)
 async def activate_hero_image(
     hero_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     try:
-        hero = (
-            db.query(Hero)
-            .filter(Hero.id == hero_id, Hero.user_id == current_user.id)
-            .first()
-        )
-        if not hero:
+        if db.get_bind().dialect.name != "postgresql":
+            # Only Postgres defers the one-active-hero check to the end of the
+            # statement; elsewhere the old row must be cleared first.
+            await db.execute(
+                update(Hero)
+                .where(
+                    Hero.user_id == current_user.id,
+                    Hero.active_img == True,
+                    Hero.id != hero_id,
+                )
+                .values(active_img=False)
+                .execution_options(synchronize_session=False)
+            )
+
+        # Touches only the new row and the previously active one
+        rows = (
+            await db.execute(
+                update(Hero)
+                .where(
+                    Hero.user_id == current_user.id,
+                    or_(Hero.id == hero_id, Hero.active_img == True),
+                )
+                .values(active_img=Hero.id == hero_id)
+                .returning(Hero.id, Hero.image, Hero.active_img, Hero.variants)
+                .execution_options(synchronize_session=False)
+            )
+        ).all()
+        hero = next((row for row in rows if row.id == hero_id), None)
+        if hero is None:
+            await db.rollback()
             raise HTTPException(status_code=404, detail="Hero not found")
 
-        db.query(Hero).filter(Hero.user_id == current_user.id).update(
-            {Hero.active_img: False}
-        )
-        hero.active_img = True
-
-        db.commit()
-        db.refresh(hero)
+        await bump_hero_version(db, current_user.id)
+        await db.commit()
+        active_hero_cache.invalidate(current_user.id)
 
-        return HeroModel(id=hero.id, image_url=hero.image, active_img=hero.active_img)
+        return to_hero_model(hero)
     except SQLAlchemyError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Database error occurred")
 
 
 @router.get("/isactive/", response_model=HeroModel)
 async def get_active_hero(
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
 ):
     try:
+        etag = await hero_etag(db, current_user.id, "active")
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return cached
+
         # Try to get the active hero image
-        active_hero = (
-            db.query(Hero)
-            .filter(Hero.user_id == current_user.id, Hero.active_img == True)
-            .first()
+        active_hero = await db.scalar(
+            select(Hero).where(Hero.user_id == current_user.id, Hero.active_img == True)
         )
 
         if active_hero is None:
             raise HTTPException(status_code=404, detail="No active images found")
 
-        return HeroModel(
-            id=active_hero.id,
-            image_url=active_hero.image,
-            active_img=active_hero.active_img,
-        )
+        set_cache_headers(response, etag)
+        return to_hero_model(active_hero)
 
     except SQLAlchemyError:
         raise HTTPException(status_code=500, detail="Database error occurred")
+
+
+@router.get("/public/{user_id}/active", response_model=HeroModel)
+async def get_public_active_hero(user_id: int, request: Request, response: Response):
+    # Unauthenticated storefront read, served from the in-process cache
+    try:
+        active_hero = await active_hero_cache.get(user_id)
+    except SQLAlchemyError:
+        raise HTTPException(status_code=500, detail="Database error occurred")
+
+    if active_hero is None:
+        raise HTTPException(
+            status_code=404,
+            detail="No active images found",
+            headers={"Cache-Control": PUBLIC_NO_ACTIVE_HERO_CACHE_CONTROL},
+        )
+
+    digest = hashlib.blake2s(active_hero.image_url.encode(), digest_size=6).hexdigest()
+    etag = f'"a{active_hero.id}.{digest}"'
+    cached = not_modified(request, etag, PUBLIC_ACTIVE_HERO_CACHE_CONTROL)
+    if cached is not None:
+        return cached
+    set_cache_headers(response, etag, PUBLIC_ACTIVE_HERO_CACHE_CONTROL)
+    return active_hero
@@ -1,11 +1,21 @@
 # backend/app/schemas/hero.py
-from pydantic import BaseModel, Field
+from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
+
+
+class HeroVariant(BaseModel):
+    width: int
+    format: str
+    url: str
 
 #! hero_model.py
 class HeroModel(BaseModel):
     id: int = Field(..., gt=0, description="The ID of the uploaded image")
     image_url: str = Field(..., min_length=1, max_length=255, description="The URL of the uploaded image")
     active_img: bool = Field(default=False, description="Whether the image is active")
+    variants: List[HeroVariant] = Field(
+        default_factory=list, description="Resized WebP/AVIF versions of the image"
+    )
 
     class Config:
         from_attributes = True
@@ -19,3 +29,44 @@ class HeroInDB(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class BulkUploadResult(BaseModel):
+    filename: str
+    ok: bool
+    hero: Optional[HeroInDB] = None
+    deduplicated: bool = False
+    error: Optional[str] = None
+
+
+class BulkUploadResponse(BaseModel):
+    uploaded: int
+    failed: int
+    results: List[BulkUploadResult]
+
+
+class BulkDeleteRequest(BaseModel):
+    ids: Optional[List[int]] = Field(
+        default=None, max_length=1000, description="Heroes to delete"
+    )
+    inactive_older_than_days: Optional[int] = Field(
+        default=None, ge=0, description="Delete inactive heroes created more than N days ago"
+    )
+
+    @model_validator(mode="after")
+    def check_filter(self):
+        if self.ids is None and self.inactive_older_than_days is None:
+            raise ValueError("Provide ids and/or inactive_older_than_days")
+        return self
+
+
+class StorageDeleteError(BaseModel):
+    path: str
+    error: str
+
+
+class BulkDeleteResponse(BaseModel):
+    deleted: int
+    ids: List[int]
+    objects_removed: int
+    storage_errors: List[StorageDeleteError]
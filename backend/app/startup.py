@@ -0,0 +1,82 @@
+# backend/app/startup.py
+#
+# Times the lifespan's startup phases (engine creation, migrations, client
+# setup) so cold starts can be compared against STARTUP_BUDGET_SECONDS. The
+# report is logged once, kept on app.state.startup_report and exported as
+# app_startup_seconds{phase} on /metrics.
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from backend.app import metrics
+
+logger = logging.getLogger(__name__)
+
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "10"))
+
+
+class StartupReport:
+    def __init__(self, budget: float = STARTUP_BUDGET_SECONDS, import_seconds: float = 0.0):
+        self.budget = budget
+        self.import_seconds = import_seconds
+        self.phases = {}
+        self.total = None
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+    def finish(self):
+        global latest_report
+        # Budget covers importing the app plus every startup phase
+        self.total = self.import_seconds + time.perf_counter() - self._started
+        breakdown = ", ".join(
+            f"{name} {seconds * 1000:.0f} ms"
+            for name, seconds in {"import": self.import_seconds, **self.phases}.items()
+        )
+        if self.total > self.budget:
+            logger.warning(
+                "Startup took %.2f s, over the %.1f s budget (%s)",
+                self.total,
+                self.budget,
+                breakdown,
+            )
+        else:
+            logger.info("Startup took %.2f s (%s)", self.total, breakdown)
+        latest_report = self
+        return self
+
+    def as_dict(self):
+        return {
+            "budget_s": self.budget,
+            "total_ms": round((self.total or 0.0) * 1000, 3),
+            "over_budget": self.total is not None and self.total > self.budget,
+            "import_ms": round(self.import_seconds * 1000, 3),
+            "phases_ms": {name: round(seconds * 1000, 3) for name, seconds in self.phases.items()},
+        }
+
+
+latest_report = None
+
+
+def startup_metrics():
+    report = latest_report
+    if report is None:
+        return
+    yield "app_startup_seconds", "gauge", "Duration of the last startup by phase", [
+        ({"phase": name}, seconds)
+        for name, seconds in {
+            "import": report.import_seconds,
+            **report.phases,
+            "total": report.total,
+        }.items()
+    ]
+
+
+metrics.registry.add_collector(startup_metrics)
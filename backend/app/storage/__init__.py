@@ -0,0 +1,61 @@
+# backend/app/storage/__init__.py
+from backend.app import config
+
+from .base import DuplicateObjectError, StorageBackend, StorageError
+from .instrumented import InstrumentedStorage
+
+__all__ = [
+    "DuplicateObjectError",
+    "InstrumentedStorage",
+    "LocalStorage",
+    "StorageBackend",
+    "StorageError",
+    "SupabaseStorage",
+    "close_storage",
+    "get_storage",
+]
+
+_storage = None
+
+# Backends are imported when selected: the Supabase one pulls in httpx.
+_BACKENDS = {
+    "LocalStorage": ".local_backend",
+    "SupabaseStorage": ".supabase_backend",
+}
+
+
+def __getattr__(name):
+    if name in _BACKENDS:
+        from importlib import import_module
+
+        return getattr(import_module(_BACKENDS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_storage() -> StorageBackend:
+    global _storage
+    if _storage is None:
+        if config.STORAGE_BACKEND == "local":
+            from .local_backend import LocalStorage
+
+            backend = LocalStorage(config.LOCAL_STORAGE_ROOT, config.LOCAL_STORAGE_BASE_URL)
+        else:
+            from .supabase_backend import SupabaseStorage
+
+            backend = SupabaseStorage(
+                config.SUPABASE_URL,
+                config.SUPABASE_KEY,
+                config.BUCKET_NAME,
+                max_connections=config.STORAGE_MAX_CONNECTIONS,
+                timeout=config.STORAGE_TIMEOUT,
+                connect_timeout=config.STORAGE_CONNECT_TIMEOUT,
+            )
+        _storage = InstrumentedStorage(backend)
+    return _storage
+
+
+async def close_storage():
+    global _storage
+    if _storage is not None:
+        await _storage.aclose()
+        _storage = None
@@ -0,0 +1,49 @@
+# backend/app/storage/base.py
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, Optional, Tuple
+
+
+class StorageError(Exception):
+    pass
+
+
+class DuplicateObjectError(StorageError):
+    pass
+
+
+# Object paths are URL-encoded keys (as built by storage_path, e.g. in
+# hero_blobs.acquire_blob); backends decode them the same way Supabase decodes
+# the request path.
+class StorageBackend(ABC):
+    @abstractmethod
+    async def upload(
+        self,
+        path: str,
+        chunks: AsyncIterator[bytes],
+        content_type: str,
+        upsert: bool = False,
+    ) -> None: ...
+
+    @abstractmethod
+    async def download(self, path: str) -> bytes: ...
+
+    @abstractmethod
+    async def delete(self, path: str) -> None: ...
+
+    # Returns {path: error message or None} for every requested path
+    @abstractmethod
+    async def delete_many(self, paths: Iterable[str]) -> Dict[str, Optional[str]]: ...
+
+    @abstractmethod
+    def public_url(self, path: str) -> str: ...
+
+    @abstractmethod
+    async def exists(self, path: str) -> bool: ...
+
+    # Every object under prefix (recursively) as (path, last modified, UTC)
+    @abstractmethod
+    def list_objects(self, prefix: str) -> AsyncIterator[Tuple[str, datetime]]: ...
+
+    async def aclose(self) -> None:
+        pass
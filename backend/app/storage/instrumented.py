@@ -0,0 +1,68 @@
+# backend/app/storage/instrumented.py
+#
+# Wraps the configured backend so every storage call is timed into the
+# /metrics histograms, whichever backend is in use.
+import time
+from typing import Dict, Iterable, Optional
+
+from backend.app import metrics
+
+from .base import StorageBackend, StorageError
+
+OPERATIONS = ("upload", "download", "delete", "delete_many", "exists", "list_objects")
+
+
+class InstrumentedStorage(StorageBackend):
+    def __init__(self, backend: StorageBackend):
+        self.backend = backend
+        self._durations = {op: metrics.storage_duration.labels(operation=op) for op in OPERATIONS}
+        self._errors = {op: metrics.storage_errors.labels(operation=op) for op in OPERATIONS}
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    async def _call(self, operation, coroutine):
+        started = time.perf_counter()
+        try:
+            return await coroutine
+        except StorageError:
+            self._errors[operation].inc()
+            raise
+        finally:
+            self._durations[operation].observe(time.perf_counter() - started)
+
+    async def upload(self, path, chunks, content_type, upsert=False):
+        return await self._call("upload", self.backend.upload(path, chunks, content_type, upsert))
+
+    async def download(self, path):
+        return await self._call("download", self.backend.download(path))
+
+    async def delete(self, path):
+        return await self._call("delete", self.backend.delete(path))
+
+    async def delete_many(self, paths: Iterable[str]) -> Dict[str, Optional[str]]:
+        results = await self._call("delete_many", self.backend.delete_many(paths))
+        failed = sum(1 for error in results.values() if error)
+        if failed:
+            self._errors["delete_many"].inc(failed)
+        return results
+
+    def public_url(self, path):
+        return self.backend.public_url(path)
+
+    async def exists(self, path):
+        return await self._call("exists", self.backend.exists(path))
+
+    async def list_objects(self, prefix):
+        started = time.perf_counter()
+        try:
+            async for item in self.backend.list_objects(prefix):
+                yield item
+        except StorageError:
+            self._errors["list_objects"].inc()
+            raise
+        finally:
+            self._durations["list_objects"].observe(time.perf_counter() - started)
+
+    async def aclose(self):
+        await self.backend.aclose()
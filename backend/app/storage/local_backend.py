@@ -0,0 +1,98 @@
+# backend/app/storage/local_backend.py
+#
+# Filesystem backend for development and benchmarks. Files are written to a
+# temporary name and renamed into place, so readers never see partial objects.
+import asyncio
+import os
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+from urllib.parse import quote, unquote
+
+from .base import DuplicateObjectError, StorageBackend, StorageError
+
+
+class LocalStorage(StorageBackend):
+    def __init__(self, root: str, base_url: str):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip("/")
+
+    def _full_path(self, path: str) -> str:
+        full_path = os.path.abspath(os.path.join(self.root, unquote(path)))
+        if not full_path.startswith(self.root + os.sep):
+            raise StorageError(f"Invalid storage path: {path}")
+        return full_path
+
+    async def upload(self, path, chunks, content_type, upsert=False):
+        full_path = self._full_path(path)
+        if not upsert and os.path.exists(full_path):
+            raise DuplicateObjectError(path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        temp_path = f"{full_path}.{uuid.uuid4().hex}.part"
+        f = await asyncio.to_thread(open, temp_path, "wb")
+        try:
+            async for chunk in chunks:
+                await asyncio.to_thread(f.write, chunk)
+        except BaseException:
+            f.close()
+            os.unlink(temp_path)
+            raise
+        f.close()
+        if not upsert and os.path.exists(full_path):
+            os.unlink(temp_path)
+            raise DuplicateObjectError(path)
+        os.replace(temp_path, full_path)
+
+    async def download(self, path):
+        full_path = self._full_path(path)
+
+        def read():
+            with open(full_path, "rb") as f:
+                return f.read()
+
+        try:
+            return await asyncio.to_thread(read)
+        except OSError as e:
+            raise StorageError(str(e)) from e
+
+    async def delete(self, path):
+        error = (await self.delete_many([path]))[path]
+        if error:
+            raise StorageError(error)
+
+    async def delete_many(self, paths: Iterable[str]) -> Dict[str, Optional[str]]:
+        results = {}
+        for path in dict.fromkeys(paths):
+            try:
+                os.unlink(self._full_path(path))
+                results[path] = None
+            except FileNotFoundError:
+                results[path] = "Object not found"
+            except (OSError, StorageError) as e:
+                results[path] = str(e)
+        return results
+
+    def public_url(self, path):
+        return f"{self.base_url}/{quote(path, safe='/%')}"
+
+    async def exists(self, path):
+        return os.path.isfile(self._full_path(path))
+
+    async def list_objects(self, prefix):
+        def scan():
+            found = []
+            for directory, _, filenames in os.walk(self._full_path(prefix)):
+                for filename in filenames:
+                    if filename.endswith(".part"):
+                        continue  # upload in progress
+                    full_path = os.path.join(directory, filename)
+                    found.append(
+                        (
+                            quote(os.path.relpath(full_path, self.root).replace(os.sep, "/")),
+                            datetime.utcfromtimestamp(os.path.getmtime(full_path)),
+                        )
+                    )
+            return found
+
+        for item in await asyncio.to_thread(scan):
+            yield item
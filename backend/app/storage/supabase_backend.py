@@ -0,0 +1,151 @@
+# backend/app/storage/supabase_backend.py
+#
+# Talks to the Supabase Storage REST API directly over one shared
+# httpx.AsyncClient, so connections are pooled across requests and uploads
+# stream without blocking the event loop.
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+from urllib.parse import quote, unquote
+
+import httpx
+
+from .base import DuplicateObjectError, StorageBackend, StorageError
+
+# Supabase accepts at most 1000 prefixes per remove call.
+DELETE_BATCH_SIZE = 1000
+LIST_PAGE_SIZE = 1000
+
+
+class SupabaseStorage(StorageBackend):
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        bucket: str,
+        max_connections: int = 20,
+        timeout: float = 60.0,
+        connect_timeout: float = 10.0,
+    ):
+        self.base_url = f"{url}/storage/v1"
+        self.bucket = bucket
+        self._client = httpx.AsyncClient(
+            headers={"Authorization": f"Bearer {key}", "apikey": key or ""},
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+        )
+
+    def _object_url(self, path: str) -> str:
+        return f"{self.base_url}/object/{self.bucket}/{quote(path, safe='/%')}"
+
+    async def upload(self, path, chunks, content_type, upsert=False):
+        try:
+            response = await self._client.post(
+                self._object_url(path),
+                content=chunks,
+                headers={
+                    "Content-Type": content_type,
+                    "x-upsert": "true" if upsert else "false",
+                    "cache-control": "max-age=3600",
+                },
+            )
+        except httpx.HTTPError as e:
+            raise StorageError(str(e)) from e
+        if response.status_code >= 400:
+            if "Duplicate" in response.text or "already exists" in response.text:
+                raise DuplicateObjectError(path)
+            raise StorageError(f"Upload failed ({response.status_code}): {response.text}")
+
+    async def download(self, path):
+        try:
+            response = await self._client.get(self._object_url(path))
+        except httpx.HTTPError as e:
+            raise StorageError(str(e)) from e
+        if response.status_code >= 400:
+            raise StorageError(f"Download failed ({response.status_code}): {response.text}")
+        return response.content
+
+    async def delete(self, path):
+        error = (await self.delete_many([path]))[path]
+        if error:
+            raise StorageError(error)
+
+    async def delete_many(self, paths: Iterable[str]) -> Dict[str, Optional[str]]:
+        paths = list(dict.fromkeys(paths))
+        results = {}
+        for start in range(0, len(paths), DELETE_BATCH_SIZE):
+            batch = paths[start : start + DELETE_BATCH_SIZE]
+            try:
+                response = await self._client.request(
+                    "DELETE",
+                    f"{self.base_url}/object/{self.bucket}",
+                    json={"prefixes": [unquote(path) for path in batch]},
+                )
+            except httpx.HTTPError as e:
+                results.update((path, str(e)) for path in batch)
+                continue
+            if response.status_code >= 400:
+                error = f"Remove failed ({response.status_code}): {response.text}"
+                results.update((path, error) for path in batch)
+                continue
+            # Only objects that existed are echoed back.
+            removed = {item.get("name") for item in response.json()}
+            for path in batch:
+                results[path] = None if unquote(path) in removed else "Object not found"
+        return results
+
+    def public_url(self, path):
+        return f"{self.base_url}/object/public/{self.bucket}/{quote(path, safe='/%')}"
+
+    async def exists(self, path):
+        try:
+            response = await self._client.head(self._object_url(path))
+        except httpx.HTTPError as e:
+            raise StorageError(str(e)) from e
+        return response.status_code == 200
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    async def list_objects(self, prefix):
+        # The list API is one level at a time; folders come back without an id.
+        folders = [unquote(prefix).strip("/")]
+        while folders:
+            folder = folders.pop()
+            offset = 0
+            while True:
+                try:
+                    response = await self._client.post(
+                        f"{self.base_url}/object/list/{self.bucket}",
+                        json={
+                            "prefix": folder,
+                            "limit": LIST_PAGE_SIZE,
+                            "offset": offset,
+                            "sortBy": {"column": "name", "order": "asc"},
+                        },
+                    )
+                except httpx.HTTPError as e:
+                    raise StorageError(str(e)) from e
+                if response.status_code >= 400:
+                    raise StorageError(f"List failed ({response.status_code}): {response.text}")
+                items = response.json()
+                for item in items:
+                    name = f"{folder}/{item['name']}"
+                    if item.get("id") is None:
+                        folders.append(name)
+                    else:
+                        yield quote(name), _parse_timestamp(item.get("updated_at"))
+                if len(items) < LIST_PAGE_SIZE:
+                    break
+                offset += LIST_PAGE_SIZE
+
+
+def _parse_timestamp(value):
+    if not value:
+        return datetime.utcnow()
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
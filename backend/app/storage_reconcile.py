@@ -0,0 +1,93 @@
+# backend/app/storage_reconcile.py
+#
+# Finds objects under media/hero/ that no database row references: leftovers
+# of uploads whose transaction never committed, or of deletions from before
+# the storage outbox. Meant to run periodically (cron / scheduled job):
+#
+#     python -m backend.app.storage_reconcile              # report orphans
+#     python -m backend.app.storage_reconcile --delete     # and remove them
+#
+# Objects younger than --grace-minutes are skipped, since an upload lands in
+# storage shortly before its row is committed.
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from backend.app.database import db as database
+from backend.app.models import Hero, HeroBlob, StorageOutbox
+from backend.app.storage import close_storage, get_storage
+from backend.app.utils.hero_blobs import hero_object_paths
+from backend.app.utils.storage_outbox import enqueue_deletes, storage_outbox
+
+RECONCILE_PREFIX = "media/hero"
+RECONCILE_GRACE_MINUTES = 60
+SCAN_BATCH_SIZE = 1000
+
+
+async def referenced_paths(session):
+    # Everything a row still points at, plus deletions already queued
+    paths = set(await session.scalars(select(HeroBlob.path)))
+    paths.update(await session.scalars(select(StorageOutbox.path)))
+    result = await session.stream(
+        select(Hero.image, Hero.blob_key, Hero.variants).execution_options(
+            yield_per=SCAN_BATCH_SIZE
+        )
+    )
+    async for image, blob_key, variants in result:
+        if blob_key is None:
+            paths.update(hero_object_paths(image, None, variants))
+        else:
+            paths.update(hero_object_paths(None, None, variants))
+    return paths
+
+
+async def find_orphans(prefix: str = RECONCILE_PREFIX, grace_minutes: int = RECONCILE_GRACE_MINUTES):
+    cutoff = datetime.utcnow() - timedelta(minutes=grace_minutes)
+    # Storage is listed first: an object uploaded after the reference scan
+    # would otherwise look orphaned (the grace period covers the rest).
+    listed = [item async for item in get_storage().list_objects(prefix)]
+    async with database.AsyncSessionLocal() as session:
+        referenced = await referenced_paths(session)
+    return [
+        path for path, modified in listed if path not in referenced and modified < cutoff
+    ], len(listed)
+
+
+async def reconcile(delete: bool, prefix: str, grace_minutes: int):
+    orphans, scanned = await find_orphans(prefix, grace_minutes)
+    for path in orphans:
+        print(path)
+    print(f"{len(orphans)} orphaned of {scanned} objects under {prefix}/")
+    if not delete or not orphans:
+        return
+
+    async with database.AsyncSessionLocal() as session:
+        ids = await enqueue_deletes(session, orphans)
+        await session.commit()
+    errors = await storage_outbox.flush(ids)
+    for path, error in errors.items():
+        print(f"Failed to delete {path}: {error}")
+    print(f"Deleted {len(orphans) - len(errors)}; {len(errors)} left in the outbox for retry")
+
+
+async def run(args):
+    try:
+        await reconcile(args.delete, args.prefix.strip("/"), args.grace_minutes)
+    finally:
+        await close_storage()
+        await database.async_engine.dispose()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find storage objects no hero references")
+    parser.add_argument("--delete", action="store_true", help="remove the orphans")
+    parser.add_argument("--prefix", default=RECONCILE_PREFIX)
+    parser.add_argument("--grace-minutes", type=int, default=RECONCILE_GRACE_MINUTES)
+    args = parser.parse_args(argv)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# backend/app/utils/active_hero_cache.py
+#
+# Per-worker cache for the public active-hero endpoint. Entries are fresh for
+# ACTIVE_HERO_FRESH_TTL seconds, then served stale for up to
+# ACTIVE_HERO_STALE_TTL more while a single background refresh runs.
+# Concurrent misses for the same user share one database query.
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_HERO_FRESH_TTL = float(os.getenv("ACTIVE_HERO_FRESH_TTL", "30"))
+ACTIVE_HERO_STALE_TTL = float(os.getenv("ACTIVE_HERO_STALE_TTL", "300"))
+ACTIVE_HERO_CACHE_SIZE = int(os.getenv("ACTIVE_HERO_CACHE_SIZE", "10000"))
+
+
+class _Entry:
+    __slots__ = ("value", "fetched_at")
+
+    def __init__(self, value, fetched_at):
+        self.value = value
+        self.fetched_at = fetched_at
+
+
+class ActiveHeroCache:
+    def __init__(self, loader, fresh_ttl: float, stale_ttl: float, max_size: int):
+        # loader(user_id) -> value or None (None is cached too, as "no active hero")
+        self.loader = loader
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = stale_ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.errors = 0
+        self.invalidations = 0
+
+    async def get(self, user_id: int):
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            age = time.monotonic() - entry.fetched_at
+            if age < self.fresh_ttl:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry.value
+            if age < self.fresh_ttl + self.stale_ttl:
+                self._entries.move_to_end(user_id)
+                self.stale_hits += 1
+                if user_id not in self._inflight:
+                    self.refreshes += 1
+                    self._start_fetch(user_id)
+                return entry.value
+
+        self.misses += 1
+        task = self._inflight.get(user_id)
+        if task is None:
+            task = self._start_fetch(user_id)
+        else:
+            self.coalesced += 1
+        # shield: a client disconnect must not cancel the fetch other waiters share
+        return await asyncio.shield(task)
+
+    def invalidate(self, user_id: int):
+        self._entries.pop(user_id, None)
+        # An in-flight fetch may have read the old row; drop it so its result
+        # is not stored and the next request queries again.
+        self._inflight.pop(user_id, None)
+        self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._inflight.clear()
+
+    def _start_fetch(self, user_id: int):
+        task = asyncio.ensure_future(self._fetch(user_id))
+        # Background refreshes have no awaiter; failures are logged in _fetch.
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._inflight[user_id] = task
+        return task
+
+    async def _fetch(self, user_id: int):
+        task = asyncio.current_task()
+        try:
+            value = await self.loader(user_id)
+        except Exception:
+            self.errors += 1
+            logger.exception("Loading active hero for user %s failed", user_id)
+            raise
+        finally:
+            current = self._inflight.get(user_id) is task
+            if current:
+                del self._inflight[user_id]
+        if current:
+            self._entries[user_id] = _Entry(value, time.monotonic())
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return value
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "fresh_ttl_seconds": self.fresh_ttl,
+            "stale_ttl_seconds": self.stale_ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+            "invalidations": self.invalidations,
+            "inflight": len(self._inflight),
+        }
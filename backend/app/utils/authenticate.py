@@ -1,22 +1,24 @@
 from datetime import datetime, timedelta
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-import smtplib
 
 import random
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from passlib.context import CryptContext
 import os
-from dotenv import load_dotenv
 
 import jwt
+from sqlalchemy import select
 
 
+from backend.app import config
 from backend.app.models.DasModelAdmin import User
 from backend.app.schemas.Token import TokenData
-from backend.app.database import get_db
+from backend.app.database import get_async_db
+from backend.app.utils.email_sender import SMTP_USERNAME, email_sender
+from backend.app.utils.hashing import password_hasher, pwd_context
+from backend.app.utils.principal_cache import UserSnapshot, principal_cache
 
 # backend/app/config.py
 
@@ -26,34 +28,23 @@ from backend.app.database import get_db
 # vonage_client = vonage.Client(key=VONAGE_API_KEY, secret=VONAGE_API_SECRET)
 # verify = vonage.Verify(vonage_client)
 
-load_dotenv()
-
 SECRET_KEY = os.getenv("SECRET_KEY_TOKEN")
 ALGORITHM = os.getenv("ALGORITHM")
 
-# EMAIL
-SMTP_SERVER = os.getenv("SMTP_SERVER")
-SMTP_PORT = os.getenv("SMTP_PORT")
-SMTP_USERNAME = os.getenv("SMTP_USERNAME")
-SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
-
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
 
-def authenticate_user(db, username: str, password: str):
-    user = db.query(User).filter(User.username == username).first()
-    if not user or not verify_password(password, user.hashed_password):
+async def authenticate_user(db, username: str, password: str):
+    user = await db.scalar(select(User).where(User.username == username))
+    if not user or not await password_hasher.verify_async(password, user.hashed_password):
         return False
     return user
 
@@ -69,12 +60,17 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db=Depends(get_db)):
+async def get_current_user(
+    token: str = Depends(oauth2_scheme), db=Depends(get_async_db)
+):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached.user
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -83,10 +79,22 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db=Depends(get_d
         token_data = TokenData(username=username)
     except jwt.PyJWTError:
         raise credentials_exception
-    user = db.query(User).filter(User.username == token_data.username).first()
+    user = await db.scalar(select(User).where(User.username == token_data.username))
     if user is None:
         raise credentials_exception
-    return user
+    principal = UserSnapshot.from_user(user)
+    principal_cache.put(token, payload, principal)
+    return principal
+
+
+async def get_admin_user(current_user: User = Depends(get_current_user)):
+    # Operational endpoints expose pool, queue and SQL internals
+    if current_user.username not in config.ADMIN_USERNAMES:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+    return current_user
 
 
 def generate_verification_code():
@@ -101,7 +109,5 @@ def send_email_verification(email: str, code: str):
     body = f"Your verification code is: {code}"
     msg.attach(MIMEText(body, "plain"))
 
-    with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-        server.starttls()
-        server.login(SMTP_USERNAME, SMTP_PASSWORD)
-        server.send_message(msg)
+    # Delivered by the background sender; never blocks the request.
+    return email_sender.enqueue(msg)
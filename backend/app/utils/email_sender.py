@@ -0,0 +1,227 @@
+# backend/app/utils/email_sender.py
+#
+# Verification emails are queued and delivered by one background thread that
+# keeps a single SMTP connection open, drains the queue in batches and retries
+# failed messages with exponential backoff. Request handlers only enqueue.
+import heapq
+import logging
+import os
+import queue
+import smtplib
+import threading
+import time
+from email.message import Message
+
+from backend.app import config, metrics  # noqa: F401  config loads .env
+
+logger = logging.getLogger(__name__)
+
+SMTP_SERVER = os.getenv("SMTP_SERVER")
+SMTP_PORT = int(os.getenv("SMTP_PORT") or 587)
+SMTP_USERNAME = os.getenv("SMTP_USERNAME")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() != "false"
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "10"))
+# Close the connection after this long without mail; servers drop idle
+# sessions anyway and reconnecting later is cheaper than a stale socket.
+SMTP_IDLE_TIMEOUT = float(os.getenv("SMTP_IDLE_TIMEOUT", "60"))
+
+EMAIL_QUEUE_SIZE = int(os.getenv("EMAIL_QUEUE_SIZE", "1000"))
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "20"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "5"))
+EMAIL_RETRY_BASE_DELAY = float(os.getenv("EMAIL_RETRY_BASE_DELAY", "2"))
+
+_STOP = object()
+
+_send_duration = metrics.email_send_duration.labels()
+_connect_duration = metrics.email_connect_duration.labels()
+
+
+class _Job:
+    __slots__ = ("message", "attempts")
+
+    def __init__(self, message: Message):
+        self.message = message
+        self.attempts = 0
+
+
+class EmailSender:
+    def __init__(self):
+        self._queue = queue.Queue(maxsize=EMAIL_QUEUE_SIZE)
+        self._retries = []  # heap of (due, sequence, job)
+        self._sequence = 0
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._smtp = None
+        self._last_used = 0.0
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.dropped = 0
+        self.batches = 0
+        self.connections = 0
+
+    def start(self):
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="email-sender", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        # Flushes whatever is already queued (pending retries are given up).
+        with self._thread_lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def enqueue(self, message: Message) -> bool:
+        self.start()
+        try:
+            self._queue.put_nowait(_Job(message))
+        except queue.Full:
+            self.dropped += 1
+            logger.error("Email queue full, dropping message to %s", message["To"])
+            return False
+        return True
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "retry_pending": len(self._retries),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "connections": self.connections,
+        }
+
+    def _run(self):
+        while True:
+            batch, stopping = self._next_batch()
+            if batch:
+                self._send_batch(batch)
+            if stopping:
+                self._disconnect()
+                return
+
+    def _next_batch(self):
+        # Wait for new mail, but wake up for due retries and idle disconnects.
+        timeout = SMTP_IDLE_TIMEOUT if self._smtp is not None else None
+        if self._retries:
+            due_in = max(self._retries[0][0] - time.monotonic(), 0)
+            timeout = due_in if timeout is None else min(timeout, due_in)
+
+        batch = []
+        stopping = False
+        try:
+            item = self._queue.get(timeout=timeout)
+            if item is _STOP:
+                stopping = True
+            else:
+                batch.append(item)
+        except queue.Empty:
+            pass
+
+        while not stopping and len(batch) < EMAIL_BATCH_SIZE:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stopping = True
+            else:
+                batch.append(item)
+
+        now = time.monotonic()
+        while self._retries and self._retries[0][0] <= now and len(batch) < EMAIL_BATCH_SIZE:
+            batch.append(heapq.heappop(self._retries)[2])
+
+        if not batch and self._smtp is not None and now - self._last_used >= SMTP_IDLE_TIMEOUT:
+            self._disconnect()
+        return batch, stopping
+
+    def _send_batch(self, batch):
+        self.batches += 1
+        for job in batch:
+            job.attempts += 1
+            try:
+                with metrics.timed(_send_duration):
+                    self._send(job.message)
+                self.sent += 1
+            except (smtplib.SMTPException, OSError) as e:
+                self._disconnect()
+                self._schedule_retry(job, e)
+        self._last_used = time.monotonic()
+
+    def _send(self, message: Message):
+        if self._smtp is None:
+            self._connect()
+        try:
+            self._smtp.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            # The reused connection went away between batches; one fresh try.
+            self._connect()
+            self._smtp.send_message(message)
+
+    def _schedule_retry(self, job: _Job, error: Exception):
+        if job.attempts >= EMAIL_MAX_ATTEMPTS:
+            self.failed += 1
+            logger.error(
+                "Giving up on email to %s after %s attempts: %s",
+                job.message["To"],
+                job.attempts,
+                error,
+            )
+            return
+        self.retried += 1
+        delay = EMAIL_RETRY_BASE_DELAY * 2 ** (job.attempts - 1)
+        self._sequence += 1
+        heapq.heappush(self._retries, (time.monotonic() + delay, self._sequence, job))
+        logger.warning("Email to %s failed (%s), retrying in %.1fs", job.message["To"], error, delay)
+
+    def _connect(self):
+        self._disconnect()
+        with metrics.timed(_connect_duration):
+            smtp = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=SMTP_TIMEOUT)
+            try:
+                if SMTP_STARTTLS:
+                    smtp.starttls()
+                if SMTP_PASSWORD:
+                    smtp.login(SMTP_USERNAME, SMTP_PASSWORD)
+            except BaseException:
+                smtp.close()
+                raise
+        self._smtp = smtp
+        self.connections += 1
+
+    def _disconnect(self):
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self._smtp.close()
+        self._smtp = None
+
+
+email_sender = EmailSender()
+
+
+def email_metrics():
+    stats = email_sender.stats()
+    yield "email_queue_depth", "gauge", "Messages waiting to be sent", [({}, stats["queued"])]
+    yield "email_retry_pending", "gauge", "Messages waiting for a retry", [
+        ({}, stats["retry_pending"])
+    ]
+    yield "email_messages_total", "counter", "Messages by outcome", [
+        ({"outcome": outcome}, stats[outcome]) for outcome in ("sent", "failed", "retried", "dropped")
+    ]
+
+
+metrics.registry.add_collector(email_metrics)
@@ -1,73 +1,94 @@
 #backend/app/utils/file_operations.py
-import os
-import urllib.parse
+import hashlib
 from fastapi import UploadFile, HTTPException
-from supabase import StorageException
-from ..config import supabase, BUCKET_NAME
-import shutil
-import tempfile
-import os
+from fastapi.concurrency import run_in_threadpool
+
+# Uploads are read exactly once, in chunks of this size, and streamed to storage
+# as they arrive; peak memory per upload is one chunk.
+UPLOAD_CHUNK_SIZE = 64 * 1024
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024  # 50 MB
+
+# Content types are decided from the leading bytes, never from the client's
+# content_type header.
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+)
+
+
+def sniff_image_type(head: bytes):
+    for signature, content_type in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    return None
+
+
+class PreparedUpload:
+    def __init__(
+        self,
+        file: UploadFile,
+        content_type: str,
+        first_chunk: bytes,
+        max_size: int,
+        digest: str = None,
+        size: int = 0,
+    ):
+        self.file = file
+        self.content_type = content_type
+        self.first_chunk = first_chunk
+        self.max_size = max_size
+        self.digest = digest
+        # Known from hashing the spool; not derived from reading chunks()
+        self.size = size
+
+    async def chunks(self):
+        # The size limit is enforced on the bytes actually received; the
+        # exception aborts the storage request mid-stream.
+        chunk = self.first_chunk
+        received = 0
+        while chunk:
+            received += len(chunk)
+            if received > self.max_size:
+                raise HTTPException(status_code=400, detail="File too large")
+            yield chunk
+            chunk = await self.file.read(UPLOAD_CHUNK_SIZE)
+
+
+async def prepare_upload(file: UploadFile, max_size: int = MAX_UPLOAD_SIZE):
+    # Cheap checks before any storage I/O: the size reported by the multipart
+    # parser and the magic bytes of the first chunk.
+    if file.size is not None and file.size > max_size:
+        raise HTTPException(status_code=400, detail="File too large")
+
+    await file.seek(0)
+    first_chunk = await file.read(UPLOAD_CHUNK_SIZE)
+    if not first_chunk:
+        raise HTTPException(status_code=400, detail="File content is empty")
+
+    content_type = sniff_image_type(first_chunk)
+    if content_type is None:
+        raise HTTPException(status_code=400, detail="Invalid file content")
+
+    # The multipart parser has already spooled the body; one pass over the
+    # spool gives the content hash (and the exact size) before any storage I/O.
+    digest, size = await run_in_threadpool(_hash_spooled, file.file, first_chunk, max_size)
+    await file.seek(len(first_chunk))
+
+    return PreparedUpload(file, content_type, first_chunk, max_size, digest, size)
+
+
+def _hash_spooled(spool, first_chunk: bytes, max_size: int):
+    digest = hashlib.sha256(first_chunk)
+    size = len(first_chunk)
+    spool.seek(size)
+    while chunk := spool.read(UPLOAD_CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_size:
+            raise HTTPException(status_code=400, detail="File too large")
+        digest.update(chunk)
+    return digest.hexdigest(), size
+
+
+def storage_path(folder: str, filename: str) -> str:
+    return f"media/{folder}/{filename}"
 
-
-
-async def upload_file(file: UploadFile, folder: str):
-    try:
-        # قراءة جزء صغير من الملف للتأكد من أنه يمكن قراءته
-        chunk = await file.read(1024)
-        await file.seek(0)  # إعادة المؤشر إلى بداية الملف
-
-        original_extension = os.path.splitext(file.filename)[1]
-        safe_name = urllib.parse.quote(os.path.splitext(file.filename)[0])
-        new_filename = f"{safe_name}{original_extension}"
-
-        storage_path = f"media/{folder}/{new_filename}"
-
-        # إنشاء ملف مؤقت
-        with tempfile.NamedTemporaryFile(delete=False, mode="wb") as temp_file:
-            # نسخ محتوى الملف المرفوع إلى الملف المؤقت
-            shutil.copyfileobj(file.file, temp_file)
-            temp_file_path = temp_file.name
-
-
-        # قراءة الملف المؤقت للتأكد من وجود محتوى
-        with open(temp_file_path, "rb") as f:
-            file_content = f.read()
-
-
-        # التأكد من أن المحتوى ليس فارغًا
-        if not file_content:
-            raise ValueError("File content is empty")
-
-        # رفع الملف إلى Supabase
-        with open(temp_file_path, "rb") as f:
-            response = supabase.storage.from_(BUCKET_NAME).upload(
-                storage_path, f, file_options={"content-type": file.content_type}
-            )
-
-        # حذف الملف المؤقت
-        os.unlink(temp_file_path)
-
-        if not response:
-            raise HTTPException(status_code=400, detail="Failed to upload file")
-
-
-        public_url = supabase.storage.from_(BUCKET_NAME).get_public_url(storage_path)
-
-        return public_url, new_filename
-
-    except ValueError as ve:
-        raise HTTPException(status_code=400, detail=str(ve))
-        
-    except Exception as e:
-        if "Duplicate" in str(e):
-            raise HTTPException(status_code=400, detail="Duplicate file")
-        else:
-            raise HTTPException(status_code=500, detail=str(e))
-
-#va
-def delete_file(folder: str, filename: str):
-    try:
-        storage_path = f"media/{folder}/{filename}"
-        supabase.storage.from_(BUCKET_NAME).remove(storage_path)
-    except Exception as e:
-        print(f"Error deleting file from storage: {str(e)}")
@@ -0,0 +1,168 @@
+# backend/app/utils/hashing.py
+#
+# bcrypt runs on a dedicated, bounded thread pool instead of the event loop.
+# The bcrypt C extension releases the GIL, so threads use all cores without the
+# pickling overhead of a process pool.
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from backend.app import metrics
+
+PASSWORD_HASH_WORKERS = int(
+    os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+# Hash/verify jobs allowed to be queued or running at once; beyond this callers
+# get a 503 immediately instead of piling up behind the pool.
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+class _OperationStats:
+    def __init__(self):
+        self.count = 0
+        self.rejected = 0
+        self.run_total = 0.0
+        self.run_max = 0.0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "rejected": self.rejected,
+            "run_avg_ms": round(self.run_total * 1000 / self.count, 3) if self.count else 0.0,
+            "run_max_ms": round(self.run_max * 1000, 3),
+            "wait_avg_ms": round(self.wait_total * 1000 / self.count, 3) if self.count else 0.0,
+            "wait_max_ms": round(self.wait_max * 1000, 3),
+        }
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._stats = {"hash": _OperationStats(), "verify": _OperationStats()}
+        self._durations = {
+            op: metrics.password_hash_duration.labels(operation=op) for op in self._stats
+        }
+        self._waits = {op: metrics.password_hash_wait.labels(operation=op) for op in self._stats}
+
+    def _reserve(self, operation: str):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._stats[operation].rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Server busy, please retry",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+
+    def _run(self, operation: str, submitted: float, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            finished = time.perf_counter()
+            self._durations[operation].observe(finished - started)
+            self._waits[operation].observe(started - submitted)
+            with self._lock:
+                stats = self._stats[operation]
+                stats.count += 1
+                stats.wait_total += started - submitted
+                stats.wait_max = max(stats.wait_max, started - submitted)
+                stats.run_total += finished - started
+                stats.run_max = max(stats.run_max, finished - started)
+
+    def _pool(self):
+        # Created on first use and again after shutdown(), so a later app
+        # lifespan in the same process gets a working pool.
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+            return self._executor
+
+    def _release(self, future=None):
+        with self._lock:
+            self._pending -= 1
+
+    def _submit(self, operation: str, fn, *args):
+        self._reserve(operation)
+        try:
+            future = self._pool().submit(
+                self._run, operation, time.perf_counter(), fn, *args
+            )
+        except RuntimeError:
+            self._release()
+            raise
+        # Also runs for jobs cancelled by shutdown() before _run started, so
+        # the reservation never outlives its job.
+        future.add_done_callback(self._release)
+        return future
+
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit("hash", pwd_context.hash, password))
+
+    async def verify_async(self, plain_password: str, hashed_password: str) -> bool:
+        return await asyncio.wrap_future(
+            self._submit("verify", pwd_context.verify, plain_password, hashed_password)
+        )
+
+    # Blocking variants for sync routes (already on a threadpool thread); they
+    # still go through the pool so the concurrency cap applies to them too.
+    def hash(self, password: str) -> str:
+        return self._submit("hash", pwd_context.hash, password).result()
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return self._submit(
+            "verify", pwd_context.verify, plain_password, hashed_password
+        ).result()
+
+    def average_run(self, operation: str) -> float:
+        # Observed seconds per hash/verify job, 0.0 before the first one
+        with self._lock:
+            stats = self._stats[operation]
+            return stats.run_total / stats.count if stats.count else 0.0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                **{name: stats.as_dict() for name, stats in self._stats.items()},
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING)
+
+
+def password_hash_metrics():
+    stats = password_hasher.stats()
+    yield "password_hash_pending", "gauge", "Hash/verify jobs queued or running", [
+        ({}, stats["pending"])
+    ]
+    yield "password_hash_rejected_total", "counter", "Jobs refused with 503 (pool saturated)", [
+        ({"operation": op}, stats[op]["rejected"]) for op in ("hash", "verify")
+    ]
+
+
+metrics.registry.add_collector(password_hash_metrics)
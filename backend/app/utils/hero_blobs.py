@@ -0,0 +1,189 @@
+# backend/app/utils/hero_blobs.py
+#
+# Content-addressed hero images. Objects are stored once per sha256 under
+# media/<folder>/<sha256><ext> and shared by reference count; heroes point at
+# their blob through HeroTable.blob_key. Reference counts change in the
+# caller's transaction; objects nothing references any more are queued for
+# deletion in that same transaction (utils/storage_outbox.py).
+import asyncio
+from collections import Counter
+
+from sqlalchemy import case, delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from fastapi import HTTPException
+
+from ..models import Hero, HeroBlob
+from ..storage import DuplicateObjectError, StorageError, get_storage
+from .file_operations import PreparedUpload, storage_path
+from .image_variants import variant_paths
+from .storage_outbox import cancel_deletes
+
+EXTENSIONS = {"image/png": ".png", "image/jpeg": ".jpg"}
+
+UPSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def blob_path(folder: str, prepared: PreparedUpload) -> str:
+    return storage_path(folder, f"{prepared.digest}{EXTENSIONS[prepared.content_type]}")
+
+
+def hero_object_paths(image_url, blob_path, variants, folder: str = "hero"):
+    # Storage objects to remove once a hero row is gone. Deduplicated heroes
+    # only own their objects once the blob's last reference is released
+    # (blob_path is then set); legacy heroes own their name-based object.
+    if blob_path is not None:
+        return [blob_path, *variant_paths(variants)]
+    if image_url is None:
+        return variant_paths(variants)
+    filename = image_url.split("/")[-1].split("?")[0]
+    return [storage_path(folder, filename), *variant_paths(variants)]
+
+
+async def acquire_blob(db, prepared: PreparedUpload, folder: str):
+    # Returns (public_url, path, reused). Identical bytes only take another
+    # reference; the upload is skipped entirely.
+    storage = get_storage()
+    path = await db.scalar(
+        update(HeroBlob)
+        .where(HeroBlob.key == prepared.digest)
+        .values(ref_count=HeroBlob.ref_count + 1)
+        .returning(HeroBlob.path)
+        .execution_options(synchronize_session=False)
+    )
+    if path is not None:
+        return storage.public_url(path), path, True
+
+    path = blob_path(folder, prepared)
+    # The content may have been released earlier with its deletion still
+    # queued; cancel it before relying on (or re-creating) the object.
+    await cancel_deletes(db, [path])
+    try:
+        await storage.upload(path, prepared.chunks(), prepared.content_type)
+    except DuplicateObjectError:
+        # Same key means same bytes: a concurrent upload of this content, or an
+        # object whose row was never committed. Any queued deletion of it was
+        # cancelled above, so it is safe to reuse.
+        pass
+    except StorageError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    insert = UPSERTS[db.get_bind().dialect.name]
+    await db.execute(
+        insert(HeroBlob)
+        .values(
+            key=prepared.digest,
+            path=path,
+            content_type=prepared.content_type,
+            size=prepared.size,
+            ref_count=1,
+        )
+        .on_conflict_do_update(
+            index_elements=[HeroBlob.key],
+            set_={"ref_count": HeroBlob.ref_count + 1},
+        )
+    )
+    return storage.public_url(path), path, False
+
+
+async def acquire_blobs(db, uploads, folder: str, concurrency: int):
+    # Batch form of acquire_blob for validated uploads: one UPDATE takes the
+    # references on known content, each new digest is uploaded once with at
+    # most `concurrency` transfers in flight, and one upsert records them.
+    # Returns {digest: (public_url, path, reused)} and {digest: error}.
+    storage = get_storage()
+    counts = Counter(prepared.digest for prepared in uploads)
+    acquired, errors = {}, {}
+
+    rows = await db.execute(
+        update(HeroBlob)
+        .where(HeroBlob.key.in_(list(counts)))
+        .values(ref_count=HeroBlob.ref_count + case(counts, value=HeroBlob.key, else_=0))
+        .returning(HeroBlob.key, HeroBlob.path)
+        .execution_options(synchronize_session=False)
+    )
+    for key, path in rows:
+        acquired[key] = (storage.public_url(path), path, True)
+
+    new = {}
+    for prepared in uploads:
+        if prepared.digest not in acquired:
+            new.setdefault(prepared.digest, prepared)
+    # As in acquire_blob: no queued deletion may outlive a re-created blob
+    await cancel_deletes(db, [blob_path(folder, prepared) for prepared in new.values()])
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def transfer(prepared):
+        path = blob_path(folder, prepared)
+        async with semaphore:
+            try:
+                await storage.upload(path, prepared.chunks(), prepared.content_type)
+            except DuplicateObjectError:
+                pass
+            except StorageError as e:
+                errors[prepared.digest] = str(e)
+                return
+        acquired[prepared.digest] = (storage.public_url(path), path, False)
+
+    await asyncio.gather(*(transfer(prepared) for prepared in new.values()))
+
+    rows = [
+        {
+            "key": digest,
+            "path": acquired[digest][1],
+            "content_type": prepared.content_type,
+            "size": prepared.size,
+            "ref_count": counts[digest],
+        }
+        for digest, prepared in new.items()
+        if digest in acquired
+    ]
+    if rows:
+        insert = UPSERTS[db.get_bind().dialect.name](HeroBlob).values(rows)
+        await db.execute(
+            insert.on_conflict_do_update(
+                index_elements=[HeroBlob.key],
+                set_={"ref_count": HeroBlob.ref_count + insert.excluded.ref_count},
+            )
+        )
+    return acquired, errors
+
+
+async def release_blob(db, key: str):
+    # Drops one reference; returns the object path once nothing references it.
+    return (await release_blobs(db, {key: 1})).get(key)
+
+
+async def release_blobs(db, counts):
+    # Drops counts[key] references per blob in one UPDATE and removes the rows
+    # that reach zero; returns {key: path} for those.
+    rows = await db.execute(
+        update(HeroBlob)
+        .where(HeroBlob.key.in_(list(counts)))
+        .values(ref_count=HeroBlob.ref_count - case(counts, value=HeroBlob.key, else_=0))
+        .returning(HeroBlob.key, HeroBlob.path, HeroBlob.ref_count)
+        .execution_options(synchronize_session=False)
+    )
+    released = {row.key: row.path for row in rows if row.ref_count <= 0}
+    if released:
+        await db.execute(
+            delete(HeroBlob)
+            .where(HeroBlob.key.in_(list(released)), HeroBlob.ref_count <= 0)
+            .execution_options(synchronize_session=False)
+        )
+    return released
+
+
+async def shared_variants(db, key: str):
+    # Variants already rendered for the same content by another hero
+    return (await shared_variants_many(db, [key])).get(key)
+
+
+async def shared_variants_many(db, keys):
+    found = {}
+    rows = await db.execute(
+        select(Hero.blob_key, Hero.variants).where(Hero.blob_key.in_(list(keys)))
+    )
+    for key, variants in rows:
+        if variants and key not in found:
+            found[key] = variants
+    return found
@@ -0,0 +1,61 @@
+# backend/app/utils/http_cache.py
+#
+# Conditional GET helpers. Authenticated hero reads derive ETags from the
+# per-user users.hero_version counter, so a revalidation costs one primary-key
+# lookup and a 304 never touches HeroTable or serializes rows.
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy import select, update
+
+from backend.app.models.DasModelAdmin import User
+
+# Clients may keep the body but must revalidate before reuse; shared caches
+# must not store it.
+PRIVATE_REVALIDATE = "private, no-cache"
+
+
+async def hero_etag(db, user_id: int, *parts) -> str:
+    version = await db.scalar(select(User.hero_version).where(User.id == user_id))
+    # parts distinguish representations (route, item id, page parameters)
+    variant = hashlib.blake2s(repr(parts).encode(), digest_size=6).hexdigest()
+    return f'W/"h{user_id}.{version or 0}.{variant}"'
+
+
+async def bump_hero_version(db, user_id: int):
+    await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(hero_version=User.hero_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified(
+    request: Request, etag: str, cache_control: str = PRIVATE_REVALIDATE
+) -> Optional[Response]:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(
+            status_code=304,
+            headers={"ETag": etag, "Cache-Control": cache_control},
+        )
+    return None
+
+
+def set_cache_headers(
+    response: Response, etag: str, cache_control: str = PRIVATE_REVALIDATE
+):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
@@ -0,0 +1,41 @@
+# backend/app/utils/image_processing.py
+#
+# CPU-bound part of the variant pipeline. Runs inside worker processes, so it
+# only depends on Pillow and must stay importable on its own.
+from io import BytesIO
+
+from PIL import Image, ImageOps, features
+
+CONTENT_TYPES = {"webp": "image/webp", "avif": "image/avif"}
+SAVE_OPTIONS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "avif": {"format": "AVIF", "quality": 60, "speed": 8},
+}
+
+
+def supported_formats(formats):
+    return [fmt for fmt in formats if fmt in CONTENT_TYPES and features.check(fmt)]
+
+
+def render_variants(data: bytes, widths, formats):
+    # Returns [(width, format, content_type, encoded bytes)], never upscaling;
+    # an image narrower than every target width gets one variant at its own width.
+    with Image.open(BytesIO(data)) as opened:
+        image = ImageOps.exif_transpose(opened)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+        targets = sorted({w for w in widths if w < image.width}) or [image.width]
+        variants = []
+        for width in targets:
+            height = max(1, round(image.height * width / image.width))
+            resized = (
+                image
+                if width == image.width
+                else image.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
+            )
+            for fmt in formats:
+                out = BytesIO()
+                resized.save(out, **SAVE_OPTIONS[fmt])
+                variants.append((width, fmt, CONTENT_TYPES[fmt], out.getvalue()))
+        return variants
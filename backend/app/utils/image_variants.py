@@ -0,0 +1,184 @@
+# backend/app/utils/image_variants.py
+#
+# Produces resized WebP/AVIF variants of uploaded hero images off the request
+# path. Decoding and encoding run in a small process pool; at most
+# IMAGE_PROCESSING_WORKERS images are downloaded/processed at once, so the API
+# workers keep their CPU. Results are recorded in HeroTable.variants.
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import update
+
+from backend.app.database import db as database
+from backend.app.models import Hero
+from backend.app.storage import StorageError, get_storage
+from backend.app.utils.http_cache import bump_hero_version
+
+logger = logging.getLogger(__name__)
+
+IMAGE_VARIANT_WIDTHS = [
+    int(w) for w in os.getenv("IMAGE_VARIANT_WIDTHS", "320,640,1280,1920").split(",")
+]
+# Requested formats; the ones this Pillow build can encode are resolved on
+# first use, so Pillow is not imported with the app.
+IMAGE_VARIANT_FORMATS = [
+    fmt for fmt in os.getenv("IMAGE_VARIANT_FORMATS", "webp,avif").split(",") if fmt
+]
+IMAGE_PROCESSING_WORKERS = int(os.getenv("IMAGE_PROCESSING_WORKERS", "2"))
+# Jobs waiting for a worker beyond this are dropped (the hero keeps serving the
+# original image).
+IMAGE_PROCESSING_MAX_PENDING = int(os.getenv("IMAGE_PROCESSING_MAX_PENDING", "100"))
+
+
+def variant_prefix(source_path: str) -> str:
+    # One set per source object: heroes sharing a content-addressed blob share
+    # its variants, and a replaced image never overwrites referenced ones.
+    token = hashlib.blake2s(source_path.encode(), digest_size=10).hexdigest()
+    return f"media/hero/variants/{token}"
+
+
+def variant_paths(variants):
+    return [variant["path"] for variant in variants or () if variant.get("path")]
+
+
+class ImageVariantPipeline:
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._formats = None
+        self._semaphore = None
+        self._tasks = set()
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def _pool(self):
+        if self._executor is None:
+            # spawn: workers must not inherit the app's threads and sockets
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    @property
+    def formats(self):
+        if self._formats is None:
+            if IMAGE_VARIANT_FORMATS:
+                from backend.app.utils.image_processing import supported_formats
+
+                self._formats = supported_formats(IMAGE_VARIANT_FORMATS)
+            else:
+                self._formats = []
+        return self._formats
+
+    def schedule(self, hero_id: int, source_path: str, image_url: str, on_update=None):
+        # on_update(user_id) runs after the variants are committed.
+        if not self.formats:
+            return None
+        if len(self._tasks) >= self.max_pending:
+            self.dropped += 1
+            logger.warning("Image variant queue full, skipping hero %s", hero_id)
+            return None
+        task = asyncio.ensure_future(self._process(hero_id, source_path, image_url, on_update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _process(self, hero_id, source_path, image_url, on_update):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        storage = get_storage()
+        uploaded = []
+        try:
+            async with self._semaphore:
+                from backend.app.utils.image_processing import render_variants
+
+                data = await storage.download(source_path)
+                rendered = await asyncio.get_running_loop().run_in_executor(
+                    self._pool(),
+                    render_variants,
+                    data,
+                    IMAGE_VARIANT_WIDTHS,
+                    self.formats,
+                )
+            del data
+
+            prefix = variant_prefix(source_path)
+            variants = []
+            for width, fmt, content_type, payload in rendered:
+                path = f"{prefix}/{width}.{fmt}"
+                await storage.upload(path, _single_chunk(payload), content_type, upsert=True)
+                uploaded.append(path)
+                variants.append(
+                    {"width": width, "format": fmt, "url": storage.public_url(path), "path": path}
+                )
+
+            async with database.AsyncSessionLocal() as session:
+                # Recorded on every hero still pointing at the processed image,
+                # including ones deduplicated onto it while this job ran.
+                user_ids = set(
+                    await session.scalars(
+                        update(Hero)
+                        .where(Hero.image == image_url)
+                        .values(variants=variants)
+                        .returning(Hero.user_id)
+                        .execution_options(synchronize_session=False)
+                    )
+                )
+                if not user_ids:
+                    await session.rollback()
+                    await storage.delete_many(uploaded)
+                    return
+                for user_id in user_ids:
+                    await bump_hero_version(session, user_id)
+                await session.commit()
+            self.completed += 1
+            if on_update is not None:
+                for user_id in user_ids:
+                    on_update(user_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.failed += 1
+            logger.exception("Generating variants for hero %s failed", hero_id)
+            if uploaded:
+                try:
+                    await storage.delete_many(uploaded)
+                except StorageError:
+                    pass
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "pending": len(self._tasks),
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "formats": self.formats,
+            "widths": IMAGE_VARIANT_WIDTHS,
+        }
+
+    async def shutdown(self):
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+async def _single_chunk(payload: bytes):
+    yield payload
+
+
+image_variant_pipeline = ImageVariantPipeline(
+    IMAGE_PROCESSING_WORKERS, IMAGE_PROCESSING_MAX_PENDING
+)
@@ -0,0 +1,129 @@
+# backend/app/utils/principal_cache.py
+#
+# In-process cache of authenticated principals, keyed by bearer token. A hit
+# skips both the JWT decode and the users lookup in get_current_user.
+# Entries never outlive the token's exp; with several workers each keeps its
+# own cache, so PRINCIPAL_CACHE_TTL bounds how long another worker may serve a
+# snapshot after an invalidation.
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    id: int
+    username: str
+    email: str
+    registration_date: Optional[datetime]
+    is_email_verified: bool
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            registration_date=user.registration_date,
+            is_email_verified=bool(user.is_email_verified),
+        )
+
+
+class _Entry:
+    __slots__ = ("expires_at", "claims", "user")
+
+    def __init__(self, expires_at, claims, user):
+        self.expires_at = expires_at
+        self.claims = claims
+        self.user = user
+
+
+class PrincipalCache:
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._tokens_by_subject = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, token: str) -> Optional[_Entry]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at <= now:
+                self._remove(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry
+
+    def put(self, token: str, claims: dict, user: UserSnapshot):
+        ttl = self.ttl
+        exp = claims.get("exp")
+        if exp is not None:
+            ttl = min(ttl, float(exp) - time.time())
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            if token in self._entries:
+                self._remove(token)
+            self._entries[token] = _Entry(time.monotonic() + ttl, claims, user)
+            self._tokens_by_subject.setdefault(user.username, set()).add(token)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate_user(self, username: str):
+        # Call whenever a user's verification state, password or account changes.
+        with self._lock:
+            for token in list(self._tokens_by_subject.get(username, ())):
+                self._remove(token)
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_subject.clear()
+
+    def _remove(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_subject.get(entry.user.username)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_subject[entry.user.username]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL)
@@ -0,0 +1,158 @@
+# backend/app/utils/rate_limit.py
+#
+# In-process token buckets in front of the bcrypt endpoints. POST /token and
+# POST /admin/register check one bucket per client IP and one per username
+# before any query or hash runs, and answer 429 with Retry-After when either
+# is empty, so a credential-stuffing burst or a retry loop cannot monopolise
+# the hashing pool. Buckets live in a bounded LRU: evicting one only forgets
+# a partly drained bucket, which at worst gives that key a fresh burst.
+# Limits are per worker process.
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException, Request, status
+
+from backend.app import metrics
+from backend.app.utils.hashing import password_hasher
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() != "false"
+# Buckets kept per limiter; least recently used ones are dropped beyond this
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "50000"))
+# Reverse proxies in front of the app that append to X-Forwarded-For; 0 uses
+# the socket peer address.
+RATE_LIMIT_TRUSTED_PROXIES = int(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "0"))
+
+# "<attempts per minute>/<burst>"
+LOGIN_RATE_PER_IP = os.getenv("LOGIN_RATE_PER_IP", "60/20")
+LOGIN_RATE_PER_USERNAME = os.getenv("LOGIN_RATE_PER_USERNAME", "10/5")
+REGISTER_RATE_PER_IP = os.getenv("REGISTER_RATE_PER_IP", "10/5")
+REGISTER_RATE_PER_USERNAME = os.getenv("REGISTER_RATE_PER_USERNAME", "5/3")
+
+
+def parse_rate(value: str):
+    per_minute, _, burst = value.partition("/")
+    return float(per_minute) / 60, float(burst or per_minute)
+
+
+class TokenBucketLimiter:
+    def __init__(self, rate: str, max_keys: int):
+        self.refill_per_second, self.burst = parse_rate(rate)
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # key -> [tokens, last refill (monotonic)]
+        self.allowed = 0
+        self.limited = 0
+        self.evictions = 0
+
+    def acquire(self, key: str) -> float:
+        # Takes one token; returns 0.0, or the seconds until one is available.
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now]
+                while len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.refill_per_second)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                self.allowed += 1
+                return 0.0
+            self.limited += 1
+            if self.refill_per_second <= 0:
+                return 60.0
+            return (1 - bucket[0]) / self.refill_per_second
+
+    def stats(self):
+        with self._lock:
+            return {
+                "keys": len(self._buckets),
+                "max_keys": self.max_keys,
+                "per_minute": round(self.refill_per_second * 60, 3),
+                "burst": self.burst,
+                "allowed": self.allowed,
+                "limited": self.limited,
+                "evictions": self.evictions,
+            }
+
+
+def client_ip(request: Request) -> str:
+    if RATE_LIMIT_TRUSTED_PROXIES:
+        forwarded = [
+            part.strip()
+            for part in request.headers.get("x-forwarded-for", "").split(",")
+            if part.strip()
+        ]
+        if len(forwarded) >= RATE_LIMIT_TRUSTED_PROXIES:
+            return forwarded[-RATE_LIMIT_TRUSTED_PROXIES]
+    return request.client.host if request.client else "unknown"
+
+
+class AuthThrottle:
+    # One endpoint's pair of limiters. `operation` is the password_hasher job
+    # a refused request would have run, for the CPU-saved estimate.
+    def __init__(self, name: str, operation: str, per_ip: str, per_username: str, max_keys: int):
+        self.name = name
+        self.operation = operation
+        self.by_ip = TokenBucketLimiter(per_ip, max_keys)
+        self.by_username = TokenBucketLimiter(per_username, max_keys)
+        self._throttled = {
+            bucket: metrics.auth_throttled.labels(endpoint=name, bucket=bucket)
+            for bucket in ("ip", "username")
+        }
+        self._cpu_saved = metrics.auth_throttled_cpu.labels(endpoint=name)
+
+    def check(self, request: Request, username: str):
+        # Raises 429 when the client IP or the username is out of attempts.
+        if not RATE_LIMIT_ENABLED:
+            return
+        for bucket, limiter, key in (
+            ("ip", self.by_ip, client_ip(request)),
+            ("username", self.by_username, (username or "").strip().lower()),
+        ):
+            retry_after = limiter.acquire(key)
+            if retry_after:
+                self._throttled[bucket].inc()
+                self._cpu_saved.inc(password_hasher.average_run(self.operation))
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many attempts, please retry later",
+                    headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+                )
+
+    def stats(self):
+        return {"ip": self.by_ip.stats(), "username": self.by_username.stats()}
+
+
+login_throttle = AuthThrottle(
+    "login", "verify", LOGIN_RATE_PER_IP, LOGIN_RATE_PER_USERNAME, RATE_LIMIT_MAX_KEYS
+)
+register_throttle = AuthThrottle(
+    "register", "hash", REGISTER_RATE_PER_IP, REGISTER_RATE_PER_USERNAME, RATE_LIMIT_MAX_KEYS
+)
+
+
+def rate_limit_stats():
+    return {
+        "enabled": RATE_LIMIT_ENABLED,
+        "trusted_proxies": RATE_LIMIT_TRUSTED_PROXIES,
+        **{throttle.name: throttle.stats() for throttle in (login_throttle, register_throttle)},
+    }
+
+
+def rate_limit_metrics():
+    yield "auth_rate_limit_keys", "gauge", "Token buckets currently tracked", [
+        ({"endpoint": throttle.name, "bucket": bucket}, len(limiter._buckets))
+        for throttle in (login_throttle, register_throttle)
+        for bucket, limiter in (("ip", throttle.by_ip), ("username", throttle.by_username))
+    ]
+
+
+metrics.registry.add_collector(rate_limit_metrics)
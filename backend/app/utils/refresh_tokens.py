@@ -0,0 +1,157 @@
+# backend/app/utils/refresh_tokens.py
+#
+# Rotating refresh tokens. Clients trade one at POST /token/refresh for a new
+# access token and a new refresh token: an HMAC and two primary-key
+# statements instead of a bcrypt verify plus a user lookup.
+#
+# A token reads "<family>.<generation>.<secret>". The family row stores only
+# HMAC-SHA256(REFRESH_TOKEN_SECRET, token) of the current generation, so a
+# leaked table cannot be replayed. Every refresh bumps the generation; a
+# token from an earlier generation means it was copied and used twice, so
+# the whole family is revoked and both holders have to log in again.
+import hashlib
+import hmac
+import os
+import secrets
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select, update
+
+from backend.app import config, metrics
+from backend.app.models import RefreshToken, User
+
+REFRESH_TOKEN_SECRET = (
+    os.getenv("REFRESH_TOKEN_SECRET") or os.getenv("SECRET_KEY_TOKEN") or ""
+).encode()
+
+_outcomes = {
+    outcome: metrics.token_refreshes.labels(result=outcome)
+    for outcome in ("ok", "invalid", "reused")
+}
+
+
+def hash_token(token: str) -> str:
+    return hmac.new(REFRESH_TOKEN_SECRET, token.encode(), hashlib.sha256).hexdigest()
+
+
+def _new_token(family: str, generation: int) -> str:
+    return f"{family}.{generation}.{secrets.token_urlsafe(32)}"
+
+
+def _parse(token: str):
+    family, _, rest = token.partition(".")
+    generation, _, secret = rest.partition(".")
+    if not (family and secret and generation.isdigit()):
+        return None
+    return family, int(generation)
+
+
+async def issue_refresh_token(db, user_id: int) -> str:
+    # Starts a new family in the caller's transaction (one per login).
+    family = secrets.token_hex(16)
+    token = _new_token(family, 0)
+    now = datetime.utcnow()
+    db.add(
+        RefreshToken(
+            id=family,
+            user_id=user_id,
+            generation=0,
+            token_hash=hash_token(token),
+            expires_at=now + timedelta(days=config.REFRESH_TOKEN_EXPIRE_DAYS),
+            created_at=now,
+        )
+    )
+    return token
+
+
+async def rotate_refresh_token(db, token: str):
+    # Returns (username, new refresh token), or None when the token is not
+    # accepted. The caller commits either way: a detected reuse revokes the
+    # family in this transaction.
+    parsed = _parse(token)
+    if parsed is None:
+        _outcomes["invalid"].inc()
+        return None
+    family, generation = parsed
+    now = datetime.utcnow()
+    row = (
+        await db.execute(
+            select(
+                RefreshToken.user_id,
+                RefreshToken.generation,
+                RefreshToken.token_hash,
+                RefreshToken.expires_at,
+                RefreshToken.revoked_at,
+                User.username,
+            )
+            .join(User, User.id == RefreshToken.user_id)
+            .where(RefreshToken.id == family)
+        )
+    ).first()
+    if row is None or row.revoked_at is not None or row.expires_at <= now:
+        _outcomes["invalid"].inc()
+        return None
+    if generation < row.generation:
+        await revoke_family(db, family, now)
+        _outcomes["reused"].inc()
+        return None
+    if generation != row.generation or not hmac.compare_digest(hash_token(token), row.token_hash):
+        _outcomes["invalid"].inc()
+        return None
+
+    new_token = _new_token(family, generation + 1)
+    # Conditional on the generation, so two concurrent refreshes with the same
+    # token cannot both succeed; the loser counts as a reuse.
+    claimed = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == family, RefreshToken.generation == generation)
+        .values(
+            generation=generation + 1,
+            token_hash=hash_token(new_token),
+            expires_at=now + timedelta(days=config.REFRESH_TOKEN_EXPIRE_DAYS),
+            refreshed_at=now,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if claimed.rowcount != 1:
+        await revoke_family(db, family, now)
+        _outcomes["reused"].inc()
+        return None
+    _outcomes["ok"].inc()
+    return row.username, new_token
+
+
+async def revoke_family(db, family: str, now: datetime = None):
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == family, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now or datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def revoke_refresh_token(db, token: str):
+    # Logout: ends the session the token belongs to. Only the current token
+    # is honoured, so an old copied one cannot be used to log someone out.
+    parsed = _parse(token)
+    if parsed is None:
+        return False
+    family, generation = parsed
+    token_hash = await db.scalar(
+        select(RefreshToken.token_hash).where(
+            RefreshToken.id == family, RefreshToken.generation == generation
+        )
+    )
+    if token_hash is None or not hmac.compare_digest(hash_token(token), token_hash):
+        return False
+    await revoke_family(db, family)
+    return True
+
+
+async def prune_expired(db, user_id: int):
+    # Keeps the table compact; runs on login for that user's finished sessions.
+    await db.execute(
+        delete(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.expires_at <= datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
@@ -0,0 +1,113 @@
+# backend/app/utils/smtp_debug.py
+#
+# Minimal in-process SMTP server that accepts everything and keeps the
+# messages in memory. Stand-in for the real mail server in local runs and
+# benchmarks (point SMTP_SERVER/SMTP_PORT at it and set SMTP_STARTTLS=false).
+#
+#     python -m backend.app.utils.smtp_debug --port 1025
+import argparse
+import socketserver
+import threading
+from email import message_from_bytes
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line: str):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        mail_from, recipients = None, []
+        self._reply("220 localhost debug SMTP ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb == "EHLO":
+                self._reply("250-localhost")
+                self._reply("250-AUTH PLAIN")
+                self._reply("250 8BITMIME")
+            elif verb == "HELO":
+                self._reply("250 localhost")
+            elif verb == "AUTH":
+                self._reply("235 Authentication successful")
+            elif verb == "MAIL":
+                mail_from, recipients = command[10:].strip(), []
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command[8:].strip())
+                self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if not data_line or data_line in (b".\r\n", b".\n"):
+                        break
+                    if data_line.startswith(b".."):
+                        data_line = data_line[1:]
+                    lines.append(data_line)
+                server.record(mail_from, recipients, b"".join(lines))
+                mail_from, recipients = None, []
+                self._reply("250 OK: queued")
+            elif verb in ("RSET", "NOOP"):
+                self._reply("250 OK")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class DebugSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, echo: bool = False):
+        super().__init__((host, port), _SMTPHandler)
+        self.echo = echo
+        self.messages = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def record(self, mail_from, recipients, data: bytes):
+        message = message_from_bytes(data)
+        with self._lock:
+            self.messages.append((mail_from, recipients, message))
+        if self.echo:
+            print(f"--- from {mail_from} to {', '.join(recipients)}")
+            print(data.decode("utf-8", "replace"))
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Debugging SMTP server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    args = parser.parse_args(argv)
+    server = DebugSMTPServer(args.host, args.port, echo=True)
+    print(f"Debug SMTP server listening on {args.host}:{server.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
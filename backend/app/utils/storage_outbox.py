@@ -0,0 +1,214 @@
+# backend/app/utils/storage_outbox.py
+#
+# Storage deletions are recorded in storage_outbox inside the transaction that
+# drops the last reference to an object, and carried out by an in-process
+# asyncio worker: batched delete_many calls, exponential backoff on failure.
+# Requests never wait on the object store for cleanup, and a crash between
+# commit and removal only delays it. On Postgres rows are claimed with
+# FOR UPDATE SKIP LOCKED, so every API process can drain the same table.
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select, update
+
+from backend.app.database import db as database
+from backend.app.models import HeroBlob, StorageOutbox
+from backend.app.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+STORAGE_OUTBOX_BATCH_SIZE = int(os.getenv("STORAGE_OUTBOX_BATCH_SIZE", "500"))
+STORAGE_OUTBOX_POLL_INTERVAL = float(os.getenv("STORAGE_OUTBOX_POLL_INTERVAL", "5"))
+STORAGE_OUTBOX_MAX_ATTEMPTS = int(os.getenv("STORAGE_OUTBOX_MAX_ATTEMPTS", "8"))
+STORAGE_OUTBOX_RETRY_BASE_DELAY = float(os.getenv("STORAGE_OUTBOX_RETRY_BASE_DELAY", "5"))
+STORAGE_OUTBOX_RETRY_MAX_DELAY = 3600.0
+
+# Deleting something that is already gone counts as done.
+ALREADY_DELETED = "Object not found"
+
+
+async def enqueue_deletes(db, paths):
+    # Adds the paths to the caller's transaction; returns the outbox ids.
+    paths = list(dict.fromkeys(paths))
+    if not paths:
+        return []
+    ids = await db.scalars(
+        insert(StorageOutbox).returning(StorageOutbox.id),
+        [{"path": path} for path in paths],
+    )
+    return list(ids)
+
+
+async def cancel_deletes(db, paths):
+    # Drops queued deletions of paths that are being referenced again (a blob
+    # re-created at the same content address), in the caller's transaction.
+    # On Postgres this waits for a worker currently deleting one of them, so
+    # an upload made after this call is never removed by that worker.
+    paths = list(dict.fromkeys(paths))
+    if not paths:
+        return 0
+    result = await db.execute(
+        delete(StorageOutbox)
+        .where(StorageOutbox.path.in_(paths))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+class StorageOutboxWorker:
+    def __init__(self, batch_size: int, poll_interval: float, max_attempts: int):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self._task = None
+        self._wakeup = None
+        self.removed = 0
+        self.retried = 0
+        self.abandoned = 0
+        self.batches = 0
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name="storage-outbox")
+
+    def notify(self):
+        # Called after a commit that enqueued deletions
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _run(self):
+        while True:
+            try:
+                handled, _ = await self.drain_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Storage outbox batch failed")
+                handled = 0
+            if handled >= self.batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def flush(self, ids):
+        # Processes specific rows right away (e.g. for a bulk delete that
+        # reports per-object results); returns {path: error} for failures,
+        # which stay queued for retry.
+        errors = {}
+        ids = list(ids)
+        for start in range(0, len(ids), self.batch_size):
+            _, batch_errors = await self.drain_once(ids[start : start + self.batch_size])
+            errors.update(batch_errors)
+        return errors
+
+    async def drain_once(self, ids=None):
+        now = datetime.utcnow()
+        async with database.AsyncSessionLocal() as session:
+            query = select(StorageOutbox.id, StorageOutbox.path, StorageOutbox.attempts)
+            if ids is None:
+                query = (
+                    query.where(StorageOutbox.next_attempt_at <= now)
+                    .order_by(StorageOutbox.next_attempt_at)
+                    .limit(self.batch_size)
+                )
+            else:
+                query = query.where(
+                    StorageOutbox.id.in_(ids), StorageOutbox.next_attempt_at.is_not(None)
+                )
+            if session.get_bind().dialect.name == "postgresql":
+                query = query.with_for_update(skip_locked=True)
+            rows = (await session.execute(query)).all()
+            if not rows:
+                await session.rollback()
+                return 0, {}
+
+            # A path that hero_blobs references again belongs to a newer
+            # upload of the same content; its queued deletion is obsolete.
+            live = set(
+                await session.scalars(
+                    select(HeroBlob.path).where(HeroBlob.path.in_({row.path for row in rows}))
+                )
+            )
+            results = await get_storage().delete_many(
+                [row.path for row in rows if row.path not in live]
+            )
+
+            done, failed, errors = [], [], {}
+            for row in rows:
+                if row.path in live:
+                    done.append(row.id)
+                    continue
+                error = results.get(row.path)
+                if error is None or error == ALREADY_DELETED:
+                    done.append(row.id)
+                    continue
+                errors[row.path] = error
+                attempts = row.attempts + 1
+                if attempts >= self.max_attempts:
+                    next_attempt_at = None
+                    self.abandoned += 1
+                    logger.error("Giving up deleting %s: %s", row.path, error)
+                else:
+                    delay = min(
+                        STORAGE_OUTBOX_RETRY_BASE_DELAY * 2 ** (attempts - 1),
+                        STORAGE_OUTBOX_RETRY_MAX_DELAY,
+                    )
+                    next_attempt_at = now + timedelta(seconds=delay)
+                    self.retried += 1
+                failed.append(
+                    {
+                        "id": row.id,
+                        "attempts": attempts,
+                        "next_attempt_at": next_attempt_at,
+                        "last_error": error[:1000],
+                    }
+                )
+
+            if done:
+                await session.execute(delete(StorageOutbox).where(StorageOutbox.id.in_(done)))
+            if failed:
+                await session.execute(update(StorageOutbox), failed)
+            await session.commit()
+
+        self.removed += len(done)
+        self.batches += 1
+        return len(rows), errors
+
+    async def stats(self):
+        async with database.AsyncSessionLocal() as session:
+            pending = await session.scalar(
+                select(func.count())
+                .select_from(StorageOutbox)
+                .where(StorageOutbox.next_attempt_at.is_not(None))
+            )
+            abandoned_rows = await session.scalar(
+                select(func.count())
+                .select_from(StorageOutbox)
+                .where(StorageOutbox.next_attempt_at.is_(None))
+            )
+        return {
+            "running": self._task is not None,
+            "pending": pending,
+            "abandoned_rows": abandoned_rows,
+            "removed": self.removed,
+            "retried": self.retried,
+            "abandoned": self.abandoned,
+            "batches": self.batches,
+        }
+
+
+storage_outbox = StorageOutboxWorker(
+    STORAGE_OUTBOX_BATCH_SIZE, STORAGE_OUTBOX_POLL_INTERVAL, STORAGE_OUTBOX_MAX_ATTEMPTS
+)
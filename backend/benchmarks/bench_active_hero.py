@@ -0,0 +1,143 @@
+# backend/benchmarks/bench_active_hero.py
+#
+# Hero lookups and activation with and without the migration 2 indexes, at
+# --heroes rows per user (default 10k) for several users.
+#
+#     python -m backend.benchmarks.bench_active_hero [--heroes 10000] [--users 3]
+#
+# "legacy" is the old schema (no user_id index) with the old activation:
+# load the hero, clear active_img on every row of the user, set the flag.
+# "indexed" is the migrated schema with the activation used by HeroRoute.
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Active hero lookup/activation benchmark")
+    parser.add_argument("--heroes", type=int, default=10000, help="heroes per user")
+    parser.add_argument("--users", type=int, default=3)
+    parser.add_argument("--iterations", type=int, default=200)
+    return parser.parse_args()
+
+
+def timed(fn, iterations):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp()
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'app.db')}")
+
+    from sqlalchemy import create_engine, insert, or_, select, text, update
+
+    from backend.app.database import Base
+    from backend.app.migrations import run_migrations
+    from backend.app.models import Hero, User
+
+    def build(name, migrated):
+        engine = create_engine(f"sqlite:///{os.path.join(workdir, name + '.db')}")
+        Base.metadata.create_all(engine)
+        if migrated:
+            run_migrations(engine)
+        else:
+            with engine.begin() as conn:
+                conn.execute(text('DROP INDEX "ix_HeroTable_user_id_id"'))
+        with engine.begin() as conn:
+            for user_id in range(1, args.users + 1):
+                conn.execute(
+                    insert(User).values(
+                        id=user_id, username=f"user{user_id}", email=f"user{user_id}@example.com"
+                    )
+                )
+            # Interleave users so a user's rows are spread over the whole table.
+            conn.execute(
+                insert(Hero),
+                [
+                    {"image": f"img-{i}", "active_img": False, "user_id": i % args.users + 1}
+                    for i in range(args.heroes * args.users)
+                ],
+            )
+        return engine
+
+    user_id = 1
+    hero_ids = None
+
+    def legacy_activate(conn, hero_id):
+        conn.execute(select(Hero).where(Hero.id == hero_id, Hero.user_id == user_id)).first()
+        conn.execute(update(Hero).where(Hero.user_id == user_id).values(active_img=False))
+        conn.execute(update(Hero).where(Hero.id == hero_id).values(active_img=True))
+
+    def indexed_activate(conn, hero_id):
+        conn.execute(
+            update(Hero)
+            .where(Hero.user_id == user_id, Hero.active_img == True, Hero.id != hero_id)
+            .values(active_img=False)
+        )
+        conn.execute(
+            update(Hero)
+            .where(Hero.user_id == user_id, or_(Hero.id == hero_id, Hero.active_img == True))
+            .values(active_img=Hero.id == hero_id)
+            .returning(Hero.id)
+        ).all()
+
+    print(
+        f"{'schema':<8} {'isactive ms':>12} {'get ms':>9} {'list ms':>9} "
+        f"{'activate ms':>12} {'rows written':>13}"
+    )
+    for name, migrated, activate in (
+        ("legacy", False, legacy_activate),
+        ("indexed", True, indexed_activate),
+    ):
+        engine = build(name, migrated)
+        with engine.connect() as conn:
+            if hero_ids is None:
+                hero_ids = conn.execute(
+                    select(Hero.id).where(Hero.user_id == user_id)
+                ).scalars().all()
+            raw = conn.connection.driver_connection
+            random.seed(1)
+            targets = iter(random.choices(hero_ids, k=args.iterations * 2))
+
+            def do_activate():
+                activate(conn, next(targets))
+                conn.commit()
+
+            before = raw.total_changes
+            activate_ms = timed(do_activate, args.iterations)
+            rows_written = (raw.total_changes - before) / args.iterations
+
+            isactive_ms = timed(
+                lambda: conn.execute(
+                    select(Hero).where(Hero.user_id == user_id, Hero.active_img == True)
+                ).first(),
+                args.iterations,
+            )
+            get_ms = timed(
+                lambda: conn.execute(
+                    select(Hero).where(Hero.id == next(targets), Hero.user_id == user_id)
+                ).first(),
+                args.iterations,
+            )
+            list_ms = timed(
+                lambda: conn.execute(select(Hero).where(Hero.user_id == user_id)).all(),
+                max(args.iterations // 10, 5),
+            )
+        engine.dispose()
+        print(
+            f"{name:<8} {isactive_ms:>12.3f} {get_ms:>9.3f} {list_ms:>9.3f} "
+            f"{activate_ms:>12.3f} {rows_written:>13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
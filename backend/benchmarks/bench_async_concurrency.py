@@ -0,0 +1,118 @@
+# backend/benchmarks/bench_async_concurrency.py
+#
+# Concurrency benchmark for the database layer used by the async route handlers.
+# Each simulated request runs the two queries of GET /hero/ (principal lookup +
+# hero listing), once through the blocking Session (old path) and once through
+# AsyncSession (new path).
+#
+#     python -m backend.benchmarks.bench_async_concurrency [--url URL] [--rtt-ms 5]
+#
+# Without --url a SQLite file stands in for Postgres; every SELECT is wrapped
+# so that it sleeps --rtt-ms inside the connection's thread, which simulates a
+# server round trip without touching the event loop itself. With --url the
+# real network latency is measured instead.
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sync vs async DB concurrency benchmark")
+    parser.add_argument("--url", help="SQLAlchemy URL (default: temporary SQLite file)")
+    parser.add_argument("--rtt-ms", type=float, default=5.0, help="simulated SQLite round trip")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    return parser.parse_args()
+
+
+def install_simulated_latency(sync_engine, rtt_ms):
+    from sqlalchemy import event
+
+    @event.listens_for(sync_engine, "connect")
+    def register_rtt(dbapi_connection, connection_record):
+        # Under aiosqlite the function runs on the connection's worker thread.
+        dbapi_connection.create_function(
+            "bench_rtt", 0, lambda: time.sleep(rtt_ms / 1000) or 1
+        )
+
+    @event.listens_for(sync_engine, "before_cursor_execute", retval=True)
+    def add_rtt(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statement = f"SELECT * FROM ({statement}) WHERE (SELECT bench_rtt())"
+        return statement, parameters
+
+
+async def drive(handler, total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await handler()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return time.perf_counter() - start, latencies
+
+
+async def run(args):
+    from sqlalchemy import select
+
+    from backend.app.database import db, engine
+    from backend.app.migrations import run_migrations
+    from backend.app.models import Hero, User
+
+    run_migrations(engine)
+    with db.SessionLocal() as session:
+        user = User(username="bench", email="bench@example.com", hashed_password="x")
+        session.add(user)
+        session.flush()
+        session.add_all(Hero(image=f"img-{i}", user_id=user.id) for i in range(20))
+        session.commit()
+
+    if not args.url:
+        engine.dispose()  # pooled connections must pick up the function
+        install_simulated_latency(engine, args.rtt_ms)
+        install_simulated_latency(db.async_engine.sync_engine, args.rtt_ms)
+
+    async def sync_handler():
+        # What the handlers did before: blocking Session calls inside async def.
+        with db.SessionLocal() as session:
+            user = session.scalar(select(User).where(User.username == "bench"))
+            session.scalars(select(Hero).where(Hero.user_id == user.id)).all()
+
+    async def async_handler():
+        async with db.AsyncSessionLocal() as session:
+            user = await session.scalar(select(User).where(User.username == "bench"))
+            (await session.scalars(select(Hero).where(Hero.user_id == user.id))).all()
+
+    print(f"{'path':<8} {'conc':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for concurrency in args.concurrency:
+        for name, handler in (("sync", sync_handler), ("async", async_handler)):
+            await drive(handler, min(args.requests, 20), concurrency)  # warm-up
+            elapsed, latencies = await drive(handler, args.requests, concurrency)
+            quantiles = statistics.quantiles(latencies, n=100)
+            print(
+                f"{name:<8} {concurrency:>5} {args.requests / elapsed:>9.1f} "
+                f"{quantiles[49] * 1000:>9.2f} {quantiles[94] * 1000:>9.2f}"
+            )
+    await db.async_engine.dispose()
+
+
+def main():
+    args = parse_args()
+    if args.url:
+        os.environ["DATABASE_URL"] = args.url
+    else:
+        path = os.path.join(tempfile.mkdtemp(), "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# backend/benchmarks/bench_bulk_upload.py
+#
+# Uploading a campaign's banners one request at a time vs. a single
+# POST /hero/upload/bulk/. --storage-latency adds a fixed delay to every
+# storage upload to stand in for the round trip to the object store (local
+# storage is otherwise just a file write).
+#
+#     python -m backend.benchmarks.bench_bulk_upload [--files 40] [--size-kb 200] [--storage-latency 40]
+import argparse
+import asyncio
+import os
+import time
+
+from backend.benchmarks.common import configure_environment, seed_user
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bulk upload benchmark")
+    parser.add_argument("--files", type=int, default=40)
+    parser.add_argument("--size-kb", type=int, default=200)
+    parser.add_argument("--storage-latency", type=float, default=40.0, help="ms per upload")
+    parser.add_argument("--rounds", type=int, default=3)
+    return parser.parse_args()
+
+
+def make_png(size_kb: int) -> bytes:
+    # A valid signature followed by random bytes: unique content per file, so
+    # deduplication does not skip any transfer.
+    return b"\x89PNG\r\n\x1a\n" + os.urandom(size_kb * 1024)
+
+
+def add_storage_latency(latency_ms: float):
+    from backend.app.storage import get_storage
+
+    storage = get_storage()
+    upload = storage.upload
+
+    async def delayed_upload(*args, **kwargs):
+        await asyncio.sleep(latency_ms / 1000)
+        return await upload(*args, **kwargs)
+
+    storage.upload = delayed_upload
+
+
+def main():
+    args = parse_args()
+    configure_environment()
+    os.environ.setdefault("IMAGE_VARIANT_FORMATS", "")
+
+    from fastapi.testclient import TestClient
+
+    from backend.app.main import app
+
+    with TestClient(app) as client:
+        _, token = seed_user()
+        headers = {"Authorization": f"Bearer {token}"}
+        add_storage_latency(args.storage_latency)
+        total_mb = args.files * args.size_kb / 1024
+
+        print(f"{args.files} files x {args.size_kb} KiB, storage latency {args.storage_latency} ms")
+        print(f"{'mode':<8} {'seconds':>8} {'files/s':>8} {'MiB/s':>8}")
+        for mode in ("single", "bulk"):
+            best = None
+            for _ in range(args.rounds):
+                files = [make_png(args.size_kb) for _ in range(args.files)]
+                start = time.perf_counter()
+                if mode == "single":
+                    for i, data in enumerate(files):
+                        response = client.post(
+                            "/hero/upload/",
+                            headers=headers,
+                            files={"file": (f"banner-{i}.png", data, "image/png")},
+                        )
+                        assert response.status_code == 200, response.text
+                else:
+                    response = client.post(
+                        "/hero/upload/bulk/",
+                        headers=headers,
+                        files=[
+                            ("files", (f"banner-{i}.png", data, "image/png"))
+                            for i, data in enumerate(files)
+                        ],
+                    )
+                    assert response.json()["uploaded"] == args.files, response.text
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            print(f"{mode:<8} {best:>8.3f} {args.files / best:>8.1f} {total_mb / best:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# backend/benchmarks/bench_conditional_get.py
+#
+# Bytes and latency of repeat polls of the authenticated hero reads, with and
+# without If-None-Match revalidation.
+#
+#     python -m backend.benchmarks.bench_conditional_get [--heroes 100] [--polls 500]
+import argparse
+import time
+
+from backend.benchmarks.common import configure_environment, percentiles, seed_user
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Conditional GET benchmark")
+    parser.add_argument("--heroes", type=int, default=100)
+    parser.add_argument("--polls", type=int, default=500)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    configure_environment()
+
+    from fastapi.testclient import TestClient
+
+    from backend.app.main import app
+
+    with TestClient(app) as client:
+        _, token = seed_user(heroes=args.heroes)
+        client.put("/hero/activate/1", headers={"Authorization": f"Bearer {token}"})
+
+        print(f"{'route':<16} {'mode':<12} {'bytes/poll':>11} {'p50 ms':>8} {'p95 ms':>8}")
+        for route in ("/hero/", "/hero/1", "/hero/isactive/"):
+            headers = {"Authorization": f"Bearer {token}"}
+            etag = client.get(route, headers=headers).headers["etag"]
+            for mode, extra in (("full", {}), ("conditional", {"If-None-Match": etag})):
+                timings, wire_bytes = [], 0
+                for _ in range(args.polls):
+                    start = time.perf_counter()
+                    response = client.get(route, headers={**headers, **extra})
+                    timings.append(time.perf_counter() - start)
+                    wire_bytes += response.num_bytes_downloaded + sum(
+                        len(k) + len(v) + 4 for k, v in response.headers.raw
+                    )
+                p50, p95, _ = percentiles(timings)
+                print(
+                    f"{route:<16} {mode:<12} {wire_bytes / args.polls:>11.0f} "
+                    f"{p50:>8.3f} {p95:>8.3f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
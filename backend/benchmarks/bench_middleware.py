@@ -0,0 +1,149 @@
+# backend/benchmarks/bench_middleware.py
+#
+# Per-middleware overhead of the stack built in main.py. The stack is taken
+# from app.user_middleware and rebuilt one layer at a time around a synthetic
+# endpoint app, which is driven directly through ASGI (no sockets, no HTTP
+# client), so the numbers are the middleware cost alone. The previous
+# BaseHTTPMiddleware implementation is measured as "legacy-header" for
+# comparison.
+#
+#     python -m backend.benchmarks.bench_middleware [--requests 5000]
+import argparse
+import asyncio
+import time
+
+from backend.benchmarks.common import configure_environment, percentiles
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="ASGI middleware overhead benchmark")
+    parser.add_argument("--requests", type=int, default=5000)
+    return parser.parse_args()
+
+
+def build_endpoint_app():
+    from fastapi import FastAPI
+    from fastapi.responses import StreamingResponse
+
+    inner = FastAPI(openapi_url=None, docs_url=None, redoc_url=None)
+    large = [{"id": i, "image_url": f"https://cdn.example.com/media/hero/{i}.png", "active_img": False} for i in range(200)]
+
+    @inner.get("/small")
+    async def small():
+        return {"id": 1, "image_url": "https://cdn.example.com/media/hero/1.png", "active_img": True}
+
+    @inner.get("/large")
+    async def large_response():
+        return large
+
+    @inner.get("/stream")
+    async def stream():
+        async def body():
+            for i in range(50):
+                yield b'{"id":%d}\n' % i
+
+        return StreamingResponse(body(), media_type="application/x-ndjson")
+
+    return inner
+
+
+def legacy_header_middleware():
+    from starlette.middleware.base import BaseHTTPMiddleware
+
+    class LegacyHeaderMiddleware(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            response = await call_next(request)
+            response.headers.update(
+                {
+                    "X-Content-Type-Options": "nosniff",
+                    "X-Frame-Options": "DENY",
+                    "X-XSS-Protection": "1; mode=block",
+                    "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
+                    "Cache-Control": "no-store, no-cache, must-revalidate, max-age=0",
+                    "Pragma": "no-cache",
+                }
+            )
+            return response
+
+    return LegacyHeaderMiddleware
+
+
+def wrap(app, middleware):
+    for entry in reversed(middleware):
+        app = entry.cls(app, *entry.args, **entry.kwargs)
+    return app
+
+
+async def drive(app, path, requests):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"bench"),
+            (b"origin", b"http://localhost:3000"),
+            (b"accept-encoding", b"gzip"),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(min(requests // 10, 200)):  # warm-up
+        await app(dict(scope), receive, send)
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await app(dict(scope), receive, send)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def run(args):
+    from starlette.middleware import Middleware
+
+    from backend.app.main import app
+
+    endpoint_app = build_endpoint_app()
+    stack = list(app.user_middleware)  # outermost first
+    layers = [("endpoint only", [])]
+    for depth in range(1, len(stack) + 1):
+        innermost = stack[-depth:]
+        layers.append((f"+ {innermost[0].cls.__name__}", innermost))
+    legacy = [Middleware(legacy_header_middleware())]
+
+    print(f"{'stack':<26} {'path':<8} {'p50 us':>8} {'p95 us':>8} {'delta p50 us':>13}")
+    for path in ("/small", "/large", "/stream"):
+        previous = None
+        for name, middleware in layers:
+            p50, p95, _ = percentiles(await drive(wrap(endpoint_app, middleware), path, args.requests))
+            delta = "" if previous is None else f"{(p50 - previous) * 1000:>13.1f}"
+            print(f"{name:<26} {path:<8} {p50 * 1000:>8.1f} {p95 * 1000:>8.1f} {delta}")
+            previous = p50
+        p50, p95, _ = percentiles(await drive(wrap(endpoint_app, legacy), path, args.requests))
+        base, _, _ = percentiles(await drive(endpoint_app, path, args.requests))
+        print(
+            f"{'legacy-header (alone)':<26} {path:<8} {p50 * 1000:>8.1f} {p95 * 1000:>8.1f} "
+            f"{(p50 - base) * 1000:>13.1f}"
+        )
+
+
+def main():
+    args = parse_args()
+    configure_environment()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
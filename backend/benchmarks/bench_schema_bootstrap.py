@@ -0,0 +1,97 @@
+# backend/benchmarks/bench_schema_bootstrap.py
+#
+# Compares the old get_db (schema introspection on every request) with the
+# fast-path get_db that only hands out a session.
+#
+#     python -m backend.benchmarks.bench_schema_bootstrap [--url URL] [--requests N]
+#
+# Without --url a throwaway SQLite file is used. Against Postgres every extra
+# query is a network round trip, so the latency gap grows accordingly.
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="get_db schema bootstrap benchmark")
+    parser.add_argument("--url", help="SQLAlchemy URL (default: temporary SQLite file)")
+    parser.add_argument("--requests", type=int, default=2000)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.url:
+        os.environ["DATABASE_URL"] = args.url
+    else:
+        path = os.path.join(tempfile.mkdtemp(), "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+
+    from sqlalchemy import event, inspect
+
+    from backend.app.database import Base, db, engine
+    from backend.app.migrations import run_migrations
+    from backend.app.models import Hero, User
+
+    run_migrations(engine)
+    with db.SessionLocal() as session:
+        user = User(username="bench", email="bench@example.com", hashed_password="x")
+        session.add(user)
+        session.flush()
+        session.add_all(Hero(image=f"img-{i}", user_id=user.id) for i in range(20))
+        session.commit()
+        user_id = user.id
+
+    statements = [0]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements[0] += 1
+
+    def legacy_get_db():
+        # The pre-bootstrap behaviour: inspect + has_table per table, every request.
+        inspector = inspect(engine)
+        for table in Base.metadata.tables.values():
+            if not inspector.has_table(table.name):
+                table.create(engine)
+        session = db.SessionLocal()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    def run(get_db):
+        timings = []
+        statements[0] = 0
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            gen = get_db()
+            session = next(gen)
+            session.query(Hero).filter(Hero.user_id == user_id).all()
+            gen.close()
+            timings.append(time.perf_counter() - start)
+        return statements[0] / args.requests, timings
+
+    results = {}
+    for name, get_db in (("legacy", legacy_get_db), ("fast-path", db.get_db)):
+        run(get_db)  # warm-up
+        results[name] = run(get_db)
+
+    print(f"{'get_db':<10} {'queries/req':>12} {'p50 ms':>9} {'p95 ms':>9}")
+    for name, (queries, timings) in results.items():
+        quantiles = statistics.quantiles(timings, n=100)
+        print(
+            f"{name:<10} {queries:>12.1f} {quantiles[49] * 1000:>9.3f} {quantiles[94] * 1000:>9.3f}"
+        )
+    legacy_p50 = statistics.median(results["legacy"][1])
+    fast_p50 = statistics.median(results["fast-path"][1])
+    print(
+        f"saved per request: {results['legacy'][0] - results['fast-path'][0]:.1f} queries, "
+        f"{(legacy_p50 - fast_p50) * 1000:.3f} ms p50"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# backend/benchmarks/common.py
+#
+# Shared setup for benchmarks that boot the whole app in-process: a throwaway
+# SQLite database, local storage and a fixed JWT secret. Must run before
+# anything under backend.app is imported.
+import os
+import statistics
+import tempfile
+
+
+def configure_environment(workdir: str = None) -> str:
+    workdir = workdir or tempfile.mkdtemp(prefix="api-bench-")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'app.db')}")
+    os.environ.setdefault("STORAGE_BACKEND", "local")
+    os.environ.setdefault("LOCAL_STORAGE_ROOT", os.path.join(workdir, "storage"))
+    os.environ.setdefault("SECRET_KEY_TOKEN", "benchmark-secret")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.setdefault("SMTP_STARTTLS", "false")
+    # Benchmarks drive /token and /admin/register far above the per-IP limits
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    return workdir
+
+
+def seed_user(username: str = "bench", heroes: int = 0, password_hash: str = "x"):
+    # Inserts a verified user (plus heroes) directly and returns (user_id, token).
+    from backend.app.database import db
+    from backend.app.models import Hero, User
+    from backend.app.utils.authenticate import create_access_token
+
+    with db.SessionLocal() as session:
+        user = User(
+            username=username,
+            email=f"{username}@example.com",
+            hashed_password=password_hash,
+            is_email_verified=True,
+        )
+        session.add(user)
+        session.flush()
+        session.add_all(
+            Hero(image=f"/storage/media/hero/{username}-{i}.png", user_id=user.id)
+            for i in range(heroes)
+        )
+        session.commit()
+        user_id = user.id
+    return user_id, create_access_token({"sub": username})
+
+
+def percentiles(samples):
+    # p50/p95/p99 in milliseconds
+    if len(samples) < 2:
+        value = samples[0] * 1000 if samples else 0.0
+        return value, value, value
+    quantiles = statistics.quantiles(samples, n=100)
+    return quantiles[49] * 1000, quantiles[94] * 1000, quantiles[98] * 1000
@@ -0,0 +1,321 @@
+# backend/benchmarks/load.py
+#
+# End-to-end load test. Boots backend.app.main:app under uvicorn in a
+# subprocess against a throwaway SQLite database (or --database-url, e.g. a
+# local Postgres), local file storage and an in-process debugging SMTP server,
+# then drives a weighted mix of /token, /hero/, /hero/isactive/, /hero/upload/
+# and /admin/register at each concurrency level (closed loop: every virtual
+# client sends its next request as soon as the previous one returns).
+#
+#     python -m backend.benchmarks.load [--mix default] [--concurrency 1 8 32]
+#         [--duration 15] [--output results.json] [--baseline previous.json]
+#
+# Throughput and p50/p95/p99 per level and per operation are printed and
+# written as JSON (tagged with the git commit); --baseline prints the change
+# against an earlier run.
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import httpx
+
+from backend.benchmarks.common import configure_environment, percentiles, seed_user
+
+PASSWORD = "bench-password"
+
+# Relative weights per operation
+MIXES = {
+    "default": {"isactive": 35, "list": 30, "token": 15, "upload": 10, "register": 10},
+    "browse": {"isactive": 55, "list": 35, "token": 8, "upload": 2},
+    "signup": {"register": 50, "token": 50},
+    "upload": {"upload": 70, "list": 30},
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="API load and latency benchmark")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="default")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per level")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds before each level")
+    parser.add_argument("--users", type=int, default=50, help="pre-registered users")
+    parser.add_argument("--upload-kb", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--database-url", help="SQLAlchemy URL (default: temporary SQLite)")
+    parser.add_argument(
+        "--with-variants",
+        action="store_true",
+        help="keep background image variant generation enabled during the run",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="JSON results file (default: load-<commit>-<time>.json)")
+    parser.add_argument("--baseline", help="earlier JSON results to compare against")
+    return parser.parse_args()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def start_server(port: int, workers: int):
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "backend.app.main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        env=os.environ.copy(),
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"uvicorn exited with status {process.returncode}")
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/hero/public/0/active", timeout=1)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit("uvicorn did not start within 60s")
+
+
+class Workload:
+    def __init__(self, client: httpx.AsyncClient, users, upload_kb: int, seed: int):
+        self.client = client
+        self.users = users  # [(username, token)]
+        self.upload_kb = upload_kb
+        self.rng = random.Random(seed)
+        self.registered = 0
+
+    def user(self):
+        return self.rng.choice(self.users)
+
+    def auth(self):
+        return {"Authorization": f"Bearer {self.user()[1]}"}
+
+    async def token(self):
+        return await self.client.post(
+            "/token", data={"username": self.user()[0], "password": PASSWORD}
+        )
+
+    async def list(self):
+        return await self.client.get("/hero/", params={"limit": 20}, headers=self.auth())
+
+    async def isactive(self):
+        return await self.client.get("/hero/isactive/", headers=self.auth())
+
+    async def upload(self, headers=None):
+        # Unique bytes per request, so deduplication never short-circuits it
+        data = b"\x89PNG\r\n\x1a\n" + self.rng.randbytes(self.upload_kb * 1024)
+        return await self.client.post(
+            "/hero/upload/",
+            headers=headers or self.auth(),
+            files={"file": ("banner.png", data, "image/png")},
+        )
+
+    async def register(self):
+        self.registered += 1
+        name = f"load-{os.getpid()}-{self.registered}"
+        return await self.client.post(
+            "/admin/register",
+            json={"username": name, "email": f"{name}@example.com", "password": PASSWORD},
+        )
+
+
+async def run_level(workload: Workload, mix, concurrency: int, duration: float, warmup: float):
+    operations, weights = zip(*mix.items())
+    samples = {operation: [] for operation in operations}
+    errors = {operation: 0 for operation in operations}
+    recording = False
+
+    async def client_loop(stop_at):
+        while time.monotonic() < stop_at:
+            operation = workload.rng.choices(operations, weights)[0]
+            start = time.perf_counter()
+            try:
+                response = await getattr(workload, operation)()
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            elapsed = time.perf_counter() - start
+            if recording:
+                samples[operation].append(elapsed)
+                errors[operation] += failed
+
+    if warmup:
+        stop_at = time.monotonic() + warmup
+        await asyncio.gather(*(client_loop(stop_at) for _ in range(concurrency)))
+
+    recording = True
+    started = time.monotonic()
+    stop_at = started + duration
+    await asyncio.gather(*(client_loop(stop_at) for _ in range(concurrency)))
+    elapsed = time.monotonic() - started
+
+    def summarize(timings, error_count):
+        p50, p95, p99 = percentiles(timings)
+        return {
+            "requests": len(timings),
+            "errors": error_count,
+            "throughput": len(timings) / elapsed,
+            "p50_ms": p50,
+            "p95_ms": p95,
+            "p99_ms": p99,
+        }
+
+    all_samples = [sample for timings in samples.values() for sample in timings]
+    return {
+        "concurrency": concurrency,
+        **summarize(all_samples, sum(errors.values())),
+        "operations": {
+            operation: summarize(samples[operation], errors[operation]) for operation in operations
+        },
+    }
+
+
+def print_level(level):
+    print(
+        f"\nconcurrency {level['concurrency']}: {level['throughput']:.1f} req/s, "
+        f"{level['errors']} errors of {level['requests']}"
+    )
+    print(f"  {'operation':<10} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    rows = [("all", level), *level["operations"].items()]
+    for name, stats in rows:
+        print(
+            f"  {name:<10} {stats['throughput']:>8.1f} {stats['p50_ms']:>8.2f} "
+            f"{stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} {stats['errors']:>7}"
+        )
+
+
+def print_comparison(results, baseline):
+    print(f"\nversus {baseline['meta']['commit']} ({baseline['meta']['timestamp']}):")
+    previous = {level["concurrency"]: level for level in baseline["levels"]}
+    for level in results["levels"]:
+        before = previous.get(level["concurrency"])
+        if before is None:
+            continue
+
+        def change(key):
+            return (level[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+
+        print(
+            f"  concurrency {level['concurrency']:>3}: throughput {change('throughput'):+6.1f}%  "
+            f"p95 {change('p95_ms'):+6.1f}%  p99 {change('p99_ms'):+6.1f}%"
+        )
+
+
+async def drive(args, port, users):
+    mix = MIXES[args.mix]
+    connections = max(args.concurrency)
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(
+        base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60
+    ) as client:
+        workload = Workload(client, users, args.upload_kb, args.seed)
+        # Every pre-registered user gets one active hero for /hero/isactive/
+        for _, token in users:
+            headers = {"Authorization": f"Bearer {token}"}
+            hero = (await workload.upload(headers)).json()
+            await client.put(f"/hero/activate/{hero['id']}", headers=headers)
+        levels = []
+        for concurrency in args.concurrency:
+            level = await run_level(workload, mix, concurrency, args.duration, args.warmup)
+            print_level(level)
+            levels.append(level)
+        return levels
+
+
+def main():
+    args = parse_args()
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    workdir = configure_environment()
+    if not args.with_variants:
+        os.environ.setdefault("IMAGE_VARIANT_FORMATS", "")
+
+    from backend.app.utils.smtp_debug import DebugSMTPServer
+
+    smtp = DebugSMTPServer().start()
+    os.environ["SMTP_SERVER"] = "127.0.0.1"
+    os.environ["SMTP_PORT"] = str(smtp.port)
+    os.environ.setdefault("SMTP_USERNAME", "bench@example.com")
+
+    port = free_port()
+    server = start_server(port, args.workers)
+    try:
+        from backend.app.utils.hashing import password_hasher
+
+        password_hash = password_hasher.hash(PASSWORD)
+        run_id = int(time.time())
+        users = []
+        for i in range(args.users):
+            username = f"bench-{run_id}-{i}"
+            _, token = seed_user(username, password_hash=password_hash)
+            users.append((username, token))
+        levels = asyncio.run(drive(args, port, users))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        smtp.stop()
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "mix": args.mix,
+            "weights": MIXES[args.mix],
+            "duration": args.duration,
+            "workers": args.workers,
+            "database": os.environ["DATABASE_URL"].split(":", 1)[0],
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "emails_delivered": len(smtp.messages),
+            "workdir": workdir,
+        },
+        "levels": levels,
+    }
+    output = args.output or f"load-{results['meta']['commit']}-{int(time.time())}.json"
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            print_comparison(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()